@@ -1,10 +1,12 @@
 import click
 import os
+import csv
+import json
 import uuid
 import shutil
 import tempfile
 import subprocess
-from src.util.config_util import SECRETS_DIR, load_config, save_config
+from src.util.config_util import SECRETS_DIR, load_config, save_config, value_field
 
 @click.group()
 def add():
@@ -12,26 +14,32 @@ def add():
     pass
 
 @click.command()
-@click.option('--value', '-v', required=True, help='Host value. Can be an IP address or a domain name.')
-@click.option('--alias', '-l', required=False, help='Host alias. If not provided, the address will be used as the alias.')
+@click.option('--value', '-v', required=True, multiple=True, help='Host value. Can be an IP address or a domain name. Repeat to add alternate addresses; the fastest reachable one is used.')
+@click.option('--alias', '-l', required=False, help='Host alias. If not provided, the first address will be used as the alias.')
 def host(value, alias):
+    address = value[0]
+    alternates = [v for v in dict.fromkeys(value[1:]) if v != address]
     if alias is None:
-        alias = value
+        alias = address
     
     config = load_config()
     
-    for host in config['hosts']:
-        if host['alias'] == alias:
-            click.echo(f"Error: Host with alias '{alias}' already exists.")
-            return
+    if config.contains('hosts', alias):
+        click.echo(f"Error: Host with alias '{alias}' already exists.")
+        return
     
-    config['hosts'].append({
-        "address": value,
+    entry = {
+        "address": address,
         "alias": alias
-    })
+    }
+    if alternates:
+        entry["alternate_addresses"] = alternates
+    config.add('hosts', entry)
     
     save_config(config)
-    click.echo(f"Host '{value}' added with alias '{alias}'.")
+    click.echo(f"Host '{address}' added with alias '{alias}'.")
+    if alternates:
+        click.echo(f"Alternate addresses: {', '.join(alternates)}")
 
 @click.command()
 @click.option('--value', '-v', required=True, help='Port value.')
@@ -42,10 +50,9 @@ def port(value, alias):
     
     config = load_config()
     
-    for port in config['ports']:
-        if port['alias'] == alias:
-            click.echo(f"Error: Port with alias '{alias}' already exists.")
-            return
+    if config.contains('ports', alias):
+        click.echo(f"Error: Port with alias '{alias}' already exists.")
+        return
     
     try:
         port_value = int(value)
@@ -53,7 +60,7 @@ def port(value, alias):
         click.echo(f"Error: Port value must be a number.")
         return
     
-    config['ports'].append({
+    config.add('ports', {
         "value": port_value,
         "alias": alias
     })
@@ -70,12 +77,11 @@ def username(value, alias):
     
     config = load_config()
     
-    for user in config['usernames']:
-        if user['alias'] == alias:
-            click.echo(f"Error: Username with alias '{alias}' already exists.")
-            return
+    if config.contains('usernames', alias):
+        click.echo(f"Error: Username with alias '{alias}' already exists.")
+        return
     
-    config['usernames'].append({
+    config.add('usernames', {
         "value": value,
         "alias": alias
     })
@@ -92,12 +98,11 @@ def password(value, alias):
     
     config = load_config()
     
-    for pwd in config['passwords']:
-        if pwd['alias'] == alias:
-            click.echo(f"Error: Password with alias '{alias}' already exists.")
-            return
+    if config.contains('passwords', alias):
+        click.echo(f"Error: Password with alias '{alias}' already exists.")
+        return
     
-    config['passwords'].append({
+    config.add('passwords', {
         "value": value,
         "alias": alias
     })
@@ -111,10 +116,9 @@ def password(value, alias):
 def keypair(path, alias):
     config = load_config()
     
-    for kp in config['keypairs']:
-        if kp['alias'] == alias:
-            click.echo(f"Error: Keypair with alias '{alias}' already exists.")
-            return
+    if config.contains('keypairs', alias):
+        click.echo(f"Error: Keypair with alias '{alias}' already exists.")
+        return
     
     os.makedirs(SECRETS_DIR, exist_ok=True)
     
@@ -166,7 +170,7 @@ def keypair(path, alias):
     
     relative_path = os.path.join('src', 'secrets', keypair_uuid)
     
-    config['keypairs'].append({
+    config.add('keypairs', {
         "path": relative_path,
         "alias": alias
     })
@@ -186,18 +190,11 @@ def environment(host_alias, port_alias, username_alias, password_alias, keypair_
     """Create an SSH environment by combining registered components."""
     config = load_config()
     
-    environments = config.get('environments', [])
-    for env in environments:
-        if env['alias'] == alias:
-            click.echo(f"Error: Environment with alias '{alias}' already exists.")
-            return
-    
-    host_found = None
-    for h in config.get('hosts', []):
-        if h['alias'] == host_alias:
-            host_found = h
-            break
+    if config.contains('environments', alias):
+        click.echo(f"Error: Environment with alias '{alias}' already exists.")
+        return
     
+    host_found = config.lookup('hosts', host_alias)
     if not host_found:
         click.echo(f"Error: Host with alias '{host_alias}' not found.")
         return
@@ -208,11 +205,7 @@ def environment(host_alias, port_alias, username_alias, password_alias, keypair_
             port_value = int(port_alias)
             port_found = {'value': port_value, 'alias': port_alias}
         except ValueError:
-            for p in config.get('ports', []):
-                if p['alias'] == port_alias:
-                    port_found = p
-                    break
-            
+            port_found = config.lookup('ports', port_alias)
             if not port_found:
                 click.echo(f"Error: Port with alias '{port_alias}' not found.")
                 return
@@ -221,44 +214,28 @@ def environment(host_alias, port_alias, username_alias, password_alias, keypair_
     
     username_found = None
     if username_alias:
-        for u in config.get('usernames', []):
-            if u['alias'] == username_alias:
-                username_found = u
-                break
-        
+        username_found = config.lookup('usernames', username_alias)
         if not username_found:
             click.echo(f"Error: Username with alias '{username_alias}' not found.")
             return
     
     password_found = None
     if password_alias:
-        for p in config.get('passwords', []):
-            if p['alias'] == password_alias:
-                password_found = p
-                break
-        
+        password_found = config.lookup('passwords', password_alias)
         if not password_found:
             click.echo(f"Error: Password with alias '{password_alias}' not found.")
             return
     
     keypair_found = None
     if keypair_alias:
-        for k in config.get('keypairs', []):
-            if k['alias'] == keypair_alias:
-                keypair_found = k
-                break
-        
+        keypair_found = config.lookup('keypairs', keypair_alias)
         if not keypair_found:
             click.echo(f"Error: Keypair with alias '{keypair_alias}' not found.")
             return
     
     proxy_found = None
     if proxy_alias:
-        for e in config.get('environments', []):
-            if e['alias'] == proxy_alias:
-                proxy_found = e
-                break
-        
+        proxy_found = config.lookup('environments', proxy_alias)
         if not proxy_found:
             click.echo(f"Error: Proxy environment with alias '{proxy_alias}' not found.")
             return
@@ -281,10 +258,7 @@ def environment(host_alias, port_alias, username_alias, password_alias, keypair_
         "proxy_alias": proxy_alias if proxy_alias else None
     }
     
-    if 'environments' not in config:
-        config['environments'] = []
-    
-    config['environments'].append(new_env)
+    config.add('environments', new_env)
     
     save_config(config)
     
@@ -304,6 +278,198 @@ def environment(host_alias, port_alias, username_alias, password_alias, keypair_
     if proxy_found:
         click.echo(f"  Proxy Jump: {proxy_alias}")
 
+BULK_TYPES = {
+    'host': 'hosts',
+    'port': 'ports',
+    'username': 'usernames',
+    'user': 'usernames',
+    'password': 'passwords',
+    'pwd': 'passwords',
+    'keypair': 'keypairs',
+    'kp': 'keypairs',
+    'environment': 'environments',
+    'env': 'environments',
+}
+
+BULK_LABELS = {
+    'hosts': 'Host',
+    'ports': 'Port',
+    'usernames': 'Username',
+    'passwords': 'Password',
+    'keypairs': 'Keypair',
+    'environments': 'Environment',
+}
+
+def read_bulk_rows(stream, fmt):
+    """Yield (line number, row, error) for each row of a CSV or JSONL stream."""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, {k: v for k, v in row.items() if k and v not in (None, '')}, None
+        return
+    
+    for line_num, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield line_num, None, "Invalid JSON."
+            continue
+        if not isinstance(row, dict):
+            yield line_num, None, "Each line must be a JSON object."
+            continue
+        nested = [k for k, v in row.items() if isinstance(v, (list, dict))]
+        if nested:
+            yield line_num, None, f"Field '{nested[0]}' must be a string or number."
+            continue
+        yield line_num, {k: v for k, v in row.items() if v not in (None, '')}, None
+
+def _bulk_environment(config, row, alias):
+    host_alias = row.get('host_alias')
+    if not host_alias or not config.contains('hosts', host_alias):
+        raise ValueError(f"Host with alias '{host_alias}' not found.")
+    
+    port_alias = str(row.get('port_alias', '22'))
+    try:
+        int(port_alias)
+    except ValueError:
+        if not config.contains('ports', port_alias):
+            raise ValueError(f"Port with alias '{port_alias}' not found.")
+    
+    for field, category in [('username_alias', 'usernames'), ('password_alias', 'passwords'), ('keypair_alias', 'keypairs')]:
+        if field in row and not config.contains(category, row[field]):
+            raise ValueError(f"{BULK_LABELS[category]} with alias '{row[field]}' not found.")
+    
+    proxy_alias = row.get('proxy_alias')
+    if proxy_alias:
+        if not config.contains('environments', proxy_alias):
+            raise ValueError(f"Proxy environment with alias '{proxy_alias}' not found.")
+        if proxy_alias == alias:
+            raise ValueError("Environment cannot use itself as proxy jump.")
+    
+    if 'password_alias' not in row and 'keypair_alias' not in row:
+        raise ValueError("Either password or keypair must be provided for authentication.")
+    
+    return {
+        "alias": alias,
+        "host_alias": host_alias,
+        "port_alias": port_alias,
+        "username_alias": row.get('username_alias'),
+        "password_alias": row.get('password_alias'),
+        "keypair_alias": row.get('keypair_alias'),
+        "proxy_alias": proxy_alias
+    }
+
+def build_bulk_entry(config, row):
+    """Validate one bulk row against `config` and return (category, entry)."""
+    kind = str(row.get('type', '')).lower()
+    category = BULK_TYPES.get(kind)
+    if category is None:
+        raise ValueError(f"Unknown type '{kind}'. Use one of: {', '.join(sorted(BULK_TYPES))}.")
+    
+    label = BULK_LABELS[category]
+    if category in ('keypairs', 'environments'):
+        if 'alias' not in row:
+            raise ValueError(f"{label} alias is required.")
+        alias = str(row['alias'])
+    else:
+        if 'value' not in row:
+            raise ValueError(f"{label} value is required.")
+        alias = str(row.get('alias', row['value']))
+    
+    if config.contains(category, alias):
+        raise ValueError(f"{label} with alias '{alias}' already exists.")
+    
+    if category == 'environments':
+        return category, _bulk_environment(config, row, alias)
+    
+    if category == 'keypairs':
+        path = row.get('path')
+        if not path or not os.path.exists(path):
+            raise ValueError(f"Keypair file '{path}' does not exist.")
+        return category, {"path": path, "alias": alias}
+    
+    value = row['value']
+    if category == 'ports':
+        try:
+            value = int(value)
+        except ValueError:
+            raise ValueError("Port value must be a number.")
+    else:
+        value = str(value)
+    return category, {value_field(category): value, "alias": alias}
+
+def _copy_keypair(path):
+    os.makedirs(SECRETS_DIR, exist_ok=True)
+    keypair_uuid = str(uuid.uuid4())
+    new_keypair_path = os.path.join(SECRETS_DIR, keypair_uuid)
+    shutil.copy2(path, new_keypair_path)
+    os.chmod(new_keypair_path, 0o600)
+    return new_keypair_path, os.path.join('src', 'secrets', keypair_uuid)
+
+@click.command()
+@click.argument('file', type=click.File('r', encoding='utf-8'), default='-')
+@click.option('--format', '-f', 'fmt', type=click.Choice(['csv', 'jsonl']), help='Input format. Detected from the file extension if not provided.')
+@click.option('--dry-run', is_flag=True, help='Validate the rows without saving anything.')
+def bulk(file, fmt, dry_run):
+    """Add many components from a CSV or JSON Lines file (or stdin) in one save.
+
+    Every row needs a `type` (host, port, username, password, keypair or
+    environment) and uses the same field names as the single add commands:
+    alias, value, path, host_alias, port_alias, username_alias,
+    password_alias, keypair_alias and proxy_alias. Rows may refer to
+    components defined earlier in the same file.
+    """
+    if fmt is None:
+        extension = os.path.splitext(file.name)[1].lower()
+        if extension == '.csv':
+            fmt = 'csv'
+        elif extension in ('.jsonl', '.ndjson', '.json'):
+            fmt = 'jsonl'
+        else:
+            click.echo("Error: Cannot detect the input format. Provide --format csv or --format jsonl.")
+            return
+    
+    config = load_config()
+    counts = {}
+    copied_files = []
+    failed = 0
+    
+    try:
+        for line_num, row, error in read_bulk_rows(file, fmt):
+            if error is None:
+                try:
+                    category, entry = build_bulk_entry(config, row)
+                    if category == 'keypairs' and not dry_run:
+                        new_keypair_path, entry['path'] = _copy_keypair(entry['path'])
+                        copied_files.append(new_keypair_path)
+                except (ValueError, OSError) as e:
+                    error = str(e)
+            
+            if error is not None:
+                failed += 1
+                click.echo(f"Row {line_num}: Error: {error}")
+                continue
+            
+            config.add(category, entry)
+            counts[category] = counts.get(category, 0) + 1
+        
+        if counts and not dry_run:
+            save_config(config)
+    except BaseException:
+        for path in copied_files:
+            os.remove(path)
+        raise
+    
+    total = sum(counts.values())
+    summary = ', '.join(f"{category}: {count}" for category, count in counts.items())
+    verb = "Validated" if dry_run else "Added"
+    click.echo(f"{verb} {total} entries" + (f" ({summary})." if summary else "."))
+    if failed:
+        click.echo(f"{failed} row(s) failed and were skipped.")
+
 add.add_command(host)
 
 add.add_command(port)
@@ -319,3 +485,5 @@ add.add_command(keypair, name='kp')
 
 add.add_command(environment)
 add.add_command(environment, name='env')
+
+add.add_command(bulk)
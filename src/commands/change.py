@@ -6,6 +6,15 @@ import shutil
 import tempfile
 import subprocess
 from src.util.config_util import SECRETS_DIR, load_config, save_config
+from src.util.resolver_util import proxy_path
+
+def rename_entry(config, category, alias, new_alias):
+    """Rename an entry and repoint the environments and profiles using it."""
+    if new_alias == alias:
+        return
+    for ref_category, ref_alias, field in config.rename(category, alias, new_alias):
+        label = 'tunnel profile' if ref_category == 'tunnel_profiles' else 'environment'
+        click.echo(f"    Updated {field} of {label} '{ref_alias}'.")
 
 @click.group()
 def change():
@@ -16,37 +25,42 @@ def change():
 @click.option('--alias', '-l', required=True, help='Host alias to change.')
 @click.option('--new-address', '-a', help='New host address.')
 @click.option('--new-alias', '-n', help='New alias for the host.')
-def host(alias, new_address, new_alias):
-    if not new_address and not new_alias:
-        click.echo("Error: Provide either --new-address or --new-alias option.")
+@click.option('--add-address', multiple=True, help='Alternate address to add (repeatable).')
+@click.option('--remove-address', multiple=True, help='Alternate address to remove (repeatable).')
+def host(alias, new_address, new_alias, add_address, remove_address):
+    if not new_address and not new_alias and not add_address and not remove_address:
+        click.echo("Error: Provide --new-address, --new-alias, --add-address or --remove-address option.")
         return
     
     config = load_config()
-    hosts = config.get('hosts', [])
-    
-    host_found = None
-    for i, h in enumerate(hosts):
-        if h['alias'] == alias:
-            host_found = i
-            break
+    host_found = config.lookup('hosts', alias)
     
     if host_found is None:
         click.echo(f"Error: Host with alias '{alias}' not found.")
         return
     
-    if new_alias and new_alias != alias:
-        for h in hosts:
-            if h['alias'] == new_alias:
-                click.echo(f"Error: Host with alias '{new_alias}' already exists.")
-                return
+    if new_alias and new_alias != alias and config.contains('hosts', new_alias):
+        click.echo(f"Error: Host with alias '{new_alias}' already exists.")
+        return
+    
+    alternates = list(host_found.get('alternate_addresses') or [])
+    missing = [a for a in remove_address if a not in alternates]
+    if missing:
+        click.echo(f"Error: '{missing[0]}' is not an alternate address of host '{alias}'.")
+        return
     
     click.echo(f"Changing host '{alias}':")
     if new_address:
-        click.echo(f"  Address: {hosts[host_found]['address']} → {new_address}")
-        hosts[host_found]['address'] = new_address
+        click.echo(f"  Address: {host_found['address']} → {new_address}")
+        config.update('hosts', alias, address=new_address)
+    if add_address or remove_address:
+        updated = [a for a in alternates if a not in remove_address]
+        updated += [a for a in dict.fromkeys(add_address) if a not in updated and a != host_found['address']]
+        click.echo(f"  Alternate addresses: {', '.join(alternates) or 'none'} → {', '.join(updated) or 'none'}")
+        config.update('hosts', alias, alternate_addresses=updated or None)
     if new_alias:
         click.echo(f"  Alias: {alias} → {new_alias}")
-        hosts[host_found]['alias'] = new_alias
+        rename_entry(config, 'hosts', alias, new_alias)
     
     save_config(config)
     click.echo("Host updated successfully.")
@@ -61,31 +75,23 @@ def port(alias, new_value, new_alias):
         return
     
     config = load_config()
-    ports = config.get('ports', [])
-    
-    port_found = None
-    for i, p in enumerate(ports):
-        if p['alias'] == alias:
-            port_found = i
-            break
+    port_found = config.lookup('ports', alias)
     
     if port_found is None:
         click.echo(f"Error: Port with alias '{alias}' not found.")
         return
     
-    if new_alias and new_alias != alias:
-        for p in ports:
-            if p['alias'] == new_alias:
-                click.echo(f"Error: Port with alias '{new_alias}' already exists.")
-                return
+    if new_alias and new_alias != alias and config.contains('ports', new_alias):
+        click.echo(f"Error: Port with alias '{new_alias}' already exists.")
+        return
     
     click.echo(f"Changing port '{alias}':")
     if new_value:
-        click.echo(f"  Value: {ports[port_found]['value']} → {new_value}")
-        ports[port_found]['value'] = new_value
+        click.echo(f"  Value: {port_found['value']} → {new_value}")
+        config.update('ports', alias, value=new_value)
     if new_alias:
         click.echo(f"  Alias: {alias} → {new_alias}")
-        ports[port_found]['alias'] = new_alias
+        rename_entry(config, 'ports', alias, new_alias)
     
     save_config(config)
     click.echo("Port updated successfully.")
@@ -100,31 +106,23 @@ def username(alias, new_value, new_alias):
         return
     
     config = load_config()
-    usernames = config.get('usernames', [])
-    
-    username_found = None
-    for i, u in enumerate(usernames):
-        if u['alias'] == alias:
-            username_found = i
-            break
+    username_found = config.lookup('usernames', alias)
     
     if username_found is None:
         click.echo(f"Error: Username with alias '{alias}' not found.")
         return
     
-    if new_alias and new_alias != alias:
-        for u in usernames:
-            if u['alias'] == new_alias:
-                click.echo(f"Error: Username with alias '{new_alias}' already exists.")
-                return
+    if new_alias and new_alias != alias and config.contains('usernames', new_alias):
+        click.echo(f"Error: Username with alias '{new_alias}' already exists.")
+        return
     
     click.echo(f"Changing username '{alias}':")
     if new_value:
-        click.echo(f"  Value: {usernames[username_found]['value']} → {new_value}")
-        usernames[username_found]['value'] = new_value
+        click.echo(f"  Value: {username_found['value']} → {new_value}")
+        config.update('usernames', alias, value=new_value)
     if new_alias:
         click.echo(f"  Alias: {alias} → {new_alias}")
-        usernames[username_found]['alias'] = new_alias
+        rename_entry(config, 'usernames', alias, new_alias)
     
     save_config(config)
     click.echo("Username updated successfully.")
@@ -139,31 +137,23 @@ def password(alias, new_value, new_alias):
         return
     
     config = load_config()
-    passwords = config.get('passwords', [])
-    
-    password_found = None
-    for i, p in enumerate(passwords):
-        if p['alias'] == alias:
-            password_found = i
-            break
+    password_found = config.lookup('passwords', alias)
     
     if password_found is None:
         click.echo(f"Error: Password with alias '{alias}' not found.")
         return
     
-    if new_alias and new_alias != alias:
-        for p in passwords:
-            if p['alias'] == new_alias:
-                click.echo(f"Error: Password with alias '{new_alias}' already exists.")
-                return
+    if new_alias and new_alias != alias and config.contains('passwords', new_alias):
+        click.echo(f"Error: Password with alias '{new_alias}' already exists.")
+        return
     
     click.echo(f"Changing password '{alias}':")
     if new_value:
         click.echo(f"  Value: **** → ****")
-        passwords[password_found]['value'] = new_value
+        config.update('passwords', alias, value=new_value)
     if new_alias:
         click.echo(f"  Alias: {alias} → {new_alias}")
-        passwords[password_found]['alias'] = new_alias
+        rename_entry(config, 'passwords', alias, new_alias)
     
     save_config(config)
     click.echo("Password updated successfully.")
@@ -178,23 +168,15 @@ def keypair(alias, new_path, new_alias):
         return
     
     config = load_config()
-    keypairs = config.get('keypairs', [])
-    
-    keypair_found = None
-    for i, k in enumerate(keypairs):
-        if k['alias'] == alias:
-            keypair_found = i
-            break
+    keypair_found = config.lookup('keypairs', alias)
     
     if keypair_found is None:
         click.echo(f"Error: Keypair with alias '{alias}' not found.")
         return
     
-    if new_alias and new_alias != alias:
-        for k in keypairs:
-            if k['alias'] == new_alias:
-                click.echo(f"Error: Keypair with alias '{new_alias}' already exists.")
-                return
+    if new_alias and new_alias != alias and config.contains('keypairs', new_alias):
+        click.echo(f"Error: Keypair with alias '{new_alias}' already exists.")
+        return
     
     if new_path:
         os.makedirs(SECRETS_DIR, exist_ok=True)
@@ -245,7 +227,7 @@ def keypair(alias, new_path, new_alias):
                 click.echo(f"Error copying keypair file: {e}")
                 return
         
-        old_path = keypairs[keypair_found]['path']
+        old_path = keypair_found['path']
         if old_path.startswith('src/secrets/'):
             old_uuid = old_path.replace('src/secrets/', '')
             old_file_path = os.path.join(SECRETS_DIR, old_uuid)
@@ -258,11 +240,11 @@ def keypair(alias, new_path, new_alias):
         
         relative_path = os.path.join('src', 'secrets', keypair_uuid)
         click.echo(f"  Path: {old_path} → {relative_path}")
-        keypairs[keypair_found]['path'] = relative_path
+        config.update('keypairs', alias, path=relative_path)
     
     if new_alias:
         click.echo(f"  Alias: {alias} → {new_alias}")
-        keypairs[keypair_found]['alias'] = new_alias
+        rename_entry(config, 'keypairs', alias, new_alias)
     
     save_config(config)
     click.echo("Keypair updated successfully.")
@@ -282,99 +264,91 @@ def environment(alias, new_alias, host_alias, port_alias, username_alias, passwo
         return
     
     config = load_config()
-    environments = config.get('environments', [])
-    
-    env_found = None
-    for i, e in enumerate(environments):
-        if e['alias'] == alias:
-            env_found = i
-            break
+    env_found = config.lookup('environments', alias)
     
     if env_found is None:
         click.echo(f"Error: Environment with alias '{alias}' not found.")
         return
     
-    if new_alias and new_alias != alias:
-        for e in environments:
-            if e['alias'] == new_alias:
-                click.echo(f"Error: Environment with alias '{new_alias}' already exists.")
-                return
+    if new_alias and new_alias != alias and config.contains('environments', new_alias):
+        click.echo(f"Error: Environment with alias '{new_alias}' already exists.")
+        return
     
-    if host_alias:
-        hosts = [h['alias'] for h in config.get('hosts', [])]
-        if host_alias not in hosts:
-            click.echo(f"Error: Host with alias '{host_alias}' not found.")
-            return
+    if host_alias and not config.contains('hosts', host_alias):
+        click.echo(f"Error: Host with alias '{host_alias}' not found.")
+        return
     
     if port_alias and port_alias != '22':
         try:
             int(port_alias)
         except ValueError:
-            ports = [p['alias'] for p in config.get('ports', [])]
-            if port_alias not in ports:
+            if not config.contains('ports', port_alias):
                 click.echo(f"Error: Port with alias '{port_alias}' not found.")
                 return
     
-    if username_alias:
-        usernames = [u['alias'] for u in config.get('usernames', [])]
-        if username_alias not in usernames:
-            click.echo(f"Error: Username with alias '{username_alias}' not found.")
-            return
+    if username_alias and not config.contains('usernames', username_alias):
+        click.echo(f"Error: Username with alias '{username_alias}' not found.")
+        return
     
-    if password_alias:
-        passwords = [p['alias'] for p in config.get('passwords', [])]
-        if password_alias not in passwords:
-            click.echo(f"Error: Password with alias '{password_alias}' not found.")
-            return
+    if password_alias and not config.contains('passwords', password_alias):
+        click.echo(f"Error: Password with alias '{password_alias}' not found.")
+        return
     
-    if keypair_alias:
-        keypairs = [k['alias'] for k in config.get('keypairs', [])]
-        if keypair_alias not in keypairs:
-            click.echo(f"Error: Keypair with alias '{keypair_alias}' not found.")
-            return
+    if keypair_alias and not config.contains('keypairs', keypair_alias):
+        click.echo(f"Error: Keypair with alias '{keypair_alias}' not found.")
+        return
     
     if proxy_alias:
         if proxy_alias == alias:
             click.echo("Error: Environment cannot use itself as proxy jump.")
             return
         
-        proxy_envs = [e['alias'] for e in config.get('environments', [])]
-        if proxy_alias not in proxy_envs:
+        if not config.contains('environments', proxy_alias):
             click.echo(f"Error: Proxy environment with alias '{proxy_alias}' not found.")
             return
+        
+        path = proxy_path(config, proxy_alias)
+        if alias in path:
+            loop = ' -> '.join([alias] + path[:path.index(alias) + 1])
+            click.echo(f"Error: Proxy chain would loop: {loop}.")
+            return
     
     click.echo(f"Changing environment '{alias}':")
-    
-    if new_alias:
-        click.echo(f"  Alias: {alias} → {new_alias}")
-        environments[env_found]['alias'] = new_alias
+    changes = {}
     
     if host_alias:
-        click.echo(f"  Host: {environments[env_found]['host_alias']} → {host_alias}")
-        environments[env_found]['host_alias'] = host_alias
+        click.echo(f"  Host: {env_found['host_alias']} → {host_alias}")
+        changes['host_alias'] = host_alias
     
     if port_alias:
-        click.echo(f"  Port: {environments[env_found].get('port_alias', '22')} → {port_alias}")
-        environments[env_found]['port_alias'] = port_alias
+        click.echo(f"  Port: {env_found.get('port_alias', '22')} → {port_alias}")
+        changes['port_alias'] = port_alias
     
     if username_alias:
-        click.echo(f"  Username: {environments[env_found].get('username_alias', 'None')} → {username_alias}")
-        environments[env_found]['username_alias'] = username_alias
+        click.echo(f"  Username: {env_found.get('username_alias', 'None')} → {username_alias}")
+        changes['username_alias'] = username_alias
     
     if password_alias:
-        old_pwd = environments[env_found].get('password_alias')
+        old_pwd = env_found.get('password_alias')
         click.echo(f"  Password: {old_pwd if old_pwd else 'None'} → {password_alias}")
-        environments[env_found]['password_alias'] = password_alias
+        changes['password_alias'] = password_alias
     
     if keypair_alias:
-        old_key = environments[env_found].get('keypair_alias')
+        old_key = env_found.get('keypair_alias')
         click.echo(f"  Keypair: {old_key if old_key else 'None'} → {keypair_alias}")
-        environments[env_found]['keypair_alias'] = keypair_alias
+        changes['keypair_alias'] = keypair_alias
     
     if proxy_alias:
-        old_proxy = environments[env_found].get('proxy_alias')
+        old_proxy = env_found.get('proxy_alias')
         click.echo(f"  Proxy: {old_proxy if old_proxy else 'None'} → {proxy_alias}")
-        environments[env_found]['proxy_alias'] = proxy_alias
+        changes['proxy_alias'] = proxy_alias
+    
+    if changes:
+        config.update('environments', alias, **changes)
+    
+    if new_alias:
+        click.echo(f"  Alias: {alias} → {new_alias}")
+        rename_entry(config, 'environments', alias, new_alias)
     
     save_config(config)
     click.echo("Environment updated successfully.")
@@ -0,0 +1,168 @@
+import click
+import fnmatch
+import os
+import signal
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from tabulate import tabulate
+from src.util.config_util import load_config, resolve_port
+from src.util.probe_util import host_addresses, select_addresses
+from src.util.resolver_util import Resolver
+
+def select_environments(config, aliases, pattern, all_envs) -> tuple:
+    """Return (environments, missing aliases) for the exec target options."""
+    if all_envs:
+        return list(config.entries('environments')), []
+    selected = []
+    missing = []
+    for alias in aliases:
+        env = config.lookup('environments', alias)
+        if env is None:
+            missing.append(alias)
+        elif env not in selected:
+            selected.append(env)
+    if pattern:
+        for env in config.entries('environments'):
+            if fnmatch.fnmatchcase(env['alias'], pattern) and env not in selected:
+                selected.append(env)
+    return selected, missing
+
+def run_on_environment(alias, ssh_command, remote_command, timeout, output_lock, processes) -> dict:
+    """Run `remote_command` through `ssh_command`, echoing output prefixed by the alias."""
+    result = {'alias': alias, 'status': 'ok', 'exit_code': None, 'duration': 0.0}
+    started = time.monotonic()
+
+    ssh_command = ssh_command.copy()
+    ssh_command[-1:-1] = ['-o', f'ConnectTimeout={min(timeout, 30)}']
+    ssh_command.extend(['--', remote_command])
+    try:
+        process = subprocess.Popen(
+            ssh_command,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            errors='replace',
+            start_new_session=True,
+        )
+    except OSError as e:
+        with output_lock:
+            click.echo(f"[{alias}] Error: {e}", err=True)
+        result['status'] = 'error'
+        return result
+
+    processes.append(process)
+    timed_out = threading.Event()
+
+    def kill():
+        # Kill the whole group so a ProxyCommand child cannot keep the pipe open.
+        timed_out.set()
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+    timer = threading.Timer(timeout, kill)
+    timer.start()
+    try:
+        for line in process.stdout:
+            with output_lock:
+                click.echo(f"[{alias}] {line.rstrip()}")
+        process.wait()
+    finally:
+        timer.cancel()
+
+    result['duration'] = time.monotonic() - started
+    if timed_out.is_set():
+        result['status'] = 'timeout'
+    else:
+        result['exit_code'] = process.returncode
+        if process.returncode != 0:
+            result['status'] = 'failed'
+    return result
+
+@click.command(name='exec')
+@click.option('--env', '-e', 'aliases', multiple=True, help='Environment alias to run on (repeatable).')
+@click.option('--match', '-m', 'pattern', help='Run on environments whose alias matches this glob pattern.')
+@click.option('--all', 'all_envs', is_flag=True, help='Run on every environment.')
+@click.option('--parallel', '-p', type=click.IntRange(min=1), default=16, show_default=True, help='Maximum number of concurrent connections.')
+@click.option('--timeout', '-t', type=click.IntRange(min=1), default=60, show_default=True, help='Seconds before a host is given up on.')
+@click.option('--no-mux', is_flag=True, help='Open dedicated connections instead of sharing masters.')
+@click.argument('command', nargs=-1, required=True)
+@click.pass_context
+def exec_(ctx, aliases, pattern, all_envs, parallel, timeout, no_mux, command):
+    """Run a command on many environments concurrently.
+
+    \b
+    Example:
+      ussh exec --match 'web-*' -- uptime
+    """
+    if not (aliases or pattern or all_envs):
+        click.echo("Error: Select environments with --env, --match or --all.")
+        ctx.exit(2)
+
+    config = load_config()
+    envs, missing = select_environments(config, aliases, pattern, all_envs)
+    for alias in missing:
+        click.echo(f"Error: Environment with alias '{alias}' not found.")
+    if missing:
+        ctx.exit(2)
+    if not envs:
+        click.echo("No environments matched.")
+        ctx.exit(2)
+
+    # Resolve on this thread: the sqlite backend's connection is not shared
+    # across threads, and ssh only needs the resulting argv.
+    results = []
+    commands = []
+    # Probe multi-address hosts in one round instead of once per environment.
+    select_addresses([
+        (host_addresses(host), resolve_port(config, env.get('port_alias')))
+        for env in envs
+        for host in [config.lookup('hosts', env['host_alias'])]
+        if host is not None
+    ])
+    resolver = Resolver(config)
+    for env in envs:
+        try:
+            commands.append((env['alias'], resolver.connection(env, multiplex=not no_mux)['command']))
+        except ValueError as e:
+            for line in str(e).splitlines():
+                click.echo(f"[{env['alias']}] Error: {line}", err=True)
+            results.append({'alias': env['alias'], 'status': 'error', 'exit_code': None, 'duration': 0.0})
+
+    remote_command = ' '.join(command)
+    output_lock = threading.Lock()
+    processes = []
+    if commands:
+        with ThreadPoolExecutor(max_workers=min(parallel, len(commands))) as executor:
+            try:
+                results.extend(executor.map(
+                    lambda item: run_on_environment(item[0], item[1], remote_command, timeout, output_lock, processes),
+                    commands,
+                ))
+            except KeyboardInterrupt:
+                # Each ssh runs in its own session, so Ctrl-C does not reach it.
+                executor.shutdown(wait=False, cancel_futures=True)
+                for process in processes:
+                    try:
+                        os.killpg(process.pid, signal.SIGKILL)
+                    except ProcessLookupError:
+                        pass
+                click.echo("\nInterrupted.")
+                ctx.exit(130)
+
+    rows = [
+        [r['alias'], r['status'], r['exit_code'] if r['exit_code'] is not None else 'N/A', f"{r['duration']:.1f}s"]
+        for r in results
+        if r['status'] != 'ok'
+    ]
+    succeeded = len(results) - len(rows)
+    if rows:
+        click.echo("\nFailed environments:")
+        click.echo(tabulate(rows, headers=["Environment", "Status", "Exit Code", "Duration"], tablefmt="grid"))
+    click.echo(f"\n{succeeded} succeeded, {len(rows)} failed, {len(results)} total.")
+    if rows:
+        ctx.exit(1)
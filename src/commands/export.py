@@ -0,0 +1,36 @@
+import click
+import os
+from src.util import config_util
+from src.util.config_util import load_config
+from src.util.ssh_config_util import write_ssh_config
+
+@click.group()
+def export():
+    """Export environments for use by other tools."""
+    pass
+
+@click.command(name='ssh-config')
+@click.option('--disable', is_flag=True, help='Remove the generated file and stop updating it.')
+def ssh_config(disable):
+    """Generate an ssh_config fragment with a Host block per environment.
+
+    Once generated, the fragment is updated after every add, change and
+    remove, so plain ssh, scp, rsync and git can use environment aliases.
+    """
+    path = config_util.SSH_CONFIG_PATH
+    if disable:
+        if os.path.exists(path):
+            os.remove(path)
+            click.echo(f"Removed '{path}'. Remove its Include line from ~/.ssh/config as well.")
+        else:
+            click.echo("ssh_config export is not enabled.")
+        return
+
+    config = load_config()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    write_ssh_config(config)
+    click.echo(f"Wrote {len(config.entries('environments'))} environment(s) to '{path}'.")
+    click.echo("\nAdd this line at the top of ~/.ssh/config, before any Host block:")
+    click.echo(f"  Include {path}")
+
+export.add_command(ssh_config)
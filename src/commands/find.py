@@ -1,47 +1,68 @@
 import click
 from tabulate import tabulate
-from src.util.config_util import load_config
+from src.util.config_util import load_config, value_field
+from src.util.search_util import entry_texts, load_environment_index, load_search_index, parse_query
+from src.util.table_util import echo_lines, format_option, group_defaults, record_lines
+
+# Fields of the machine-readable formats, in column order.
+RESULT_FIELDS = ['type', 'alias', 'value']
+ENVIRONMENT_FIELDS = ['alias', 'host', 'addresses', 'port', 'username_alias', 'user', 'keypair_alias', 'key_path', 'password_alias', 'proxy']
 
 def search_in_items(items, query, item_type):
     results = []
     query_lower = query.lower()
     
     for item in items:
-        if item_type == 'hosts':
-            value_field = 'address'
-        elif item_type == 'keypairs':
-            value_field = 'path'
-        else:
-            value_field = 'value'
-        
-        alias_match = query_lower in str(item.get('alias', '')).lower()
-        value_match = query_lower in str(item.get(value_field, '')).lower()
-        
-        if alias_match or value_match:
+        if any(query_lower in text.lower() for text in entry_texts(item_type, item)):
             results.append({
                 'type': item_type.rstrip('s'),
                 'alias': item['alias'],
-                'value': item.get(value_field)
+                'value': item.get(value_field(item_type))
             })
     
     return results
 
-def print_search_results(results, query):
+def search_config(config, query, categories):
+    """Return ranked, typo-tolerant matches for `query` in `categories`.
+
+    Queries shorter than a trigram are matched as plain substrings.
+    """
+    if len(query) < 3:
+        results = []
+        for category in categories:
+            results.extend(search_in_items(config.entries(category), query, category))
+        return results
+    
+    results = []
+    for category, alias, _ in load_search_index(config).search(query, categories):
+        item = config.lookup(category, alias)
+        if item is not None:
+            results.append({
+                'type': category.rstrip('s'),
+                'alias': alias,
+                'value': item.get(value_field(category))
+            })
+    return results
+
+def masked_value(result):
+    return '****' if result['type'] == 'password' else result['value']
+
+def print_search_results(results, query, output_format='table'):
+    if output_format != 'table':
+        records = ({**result, 'value': masked_value(result)} for result in results)
+        echo_lines(record_lines(records, output_format, RESULT_FIELDS), pager=False)
+        return
+    
     if not results:
         click.echo(f"No results found for query: '{query}'")
         return
     
     table_data = []
     for result in results:
-        if result['type'] == 'password':
-            value_display = '****'
-        else:
-            value_display = result['value']
-        
         table_data.append([
             result['type'].upper(),
             result['alias'],
-            value_display
+            masked_value(result)
         ])
     
     click.echo(f"\nSearch results for '{query}':")
@@ -50,8 +71,9 @@ def print_search_results(results, query):
 
 @click.group(invoke_without_command=True)
 @click.option('--query', '-q', required=False, help='Search query for value or alias')
+@format_option
 @click.pass_context
-def find(ctx, query):
+def find(ctx, query, output_format):
     """Search for stored SSH connection information by value or alias."""
     if ctx.invoked_subcommand is None:
         if not query:
@@ -60,62 +82,112 @@ def find(ctx, query):
             return
         
         config = load_config()
-        all_results = []
-        
-        for category in ['hosts', 'ports', 'usernames', 'passwords', 'keypairs']:
-            items = config.get(category, [])
-            results = search_in_items(items, query, category)
-            all_results.extend(results)
-        
-        print_search_results(all_results, query)
+        results = search_config(config, query, ['hosts', 'ports', 'usernames', 'passwords', 'keypairs'])
+        print_search_results(results, query, output_format)
 
 @click.command()
 @click.option('--query', '-q', required=True, help='Search query for host address or alias')
-def host(query):
+@format_option
+@click.pass_context
+def host(ctx, query, output_format):
+    output_format = group_defaults(ctx, output_format=output_format)['output_format']
     config = load_config()
-    hosts = config.get('hosts', [])
-    results = search_in_items(hosts, query, 'hosts')
-    print_search_results(results, query)
+    results = search_config(config, query, ['hosts'])
+    print_search_results(results, query, output_format)
 
 @click.command()
 @click.option('--query', '-q', required=True, help='Search query for port value or alias')
-def port(query):
+@format_option
+@click.pass_context
+def port(ctx, query, output_format):
+    output_format = group_defaults(ctx, output_format=output_format)['output_format']
     config = load_config()
-    ports = config.get('ports', [])
-    results = search_in_items(ports, query, 'ports')
-    print_search_results(results, query)
+    results = search_config(config, query, ['ports'])
+    print_search_results(results, query, output_format)
 
 @click.command()
 @click.option('--query', '-q', required=True, help='Search query for username value or alias')
-def username(query):
+@format_option
+@click.pass_context
+def username(ctx, query, output_format):
+    output_format = group_defaults(ctx, output_format=output_format)['output_format']
     config = load_config()
-    usernames = config.get('usernames', [])
-    results = search_in_items(usernames, query, 'usernames')
-    print_search_results(results, query)
+    results = search_config(config, query, ['usernames'])
+    print_search_results(results, query, output_format)
 
 @click.command()
 @click.option('--query', '-q', required=True, help='Search query for password alias')
-def password(query):
+@format_option
+@click.pass_context
+def password(ctx, query, output_format):
+    output_format = group_defaults(ctx, output_format=output_format)['output_format']
     config = load_config()
-    passwords = config.get('passwords', [])
-    results = search_in_items(passwords, query, 'passwords')
-    print_search_results(results, query)
+    results = search_config(config, query, ['passwords'])
+    print_search_results(results, query, output_format)
 
 @click.command()
 @click.option('--query', '-q', required=True, help='Search query for keypair path or alias')
-def keypair(query):
+@format_option
+@click.pass_context
+def keypair(ctx, query, output_format):
+    output_format = group_defaults(ctx, output_format=output_format)['output_format']
     config = load_config()
-    keypairs = config.get('keypairs', [])
-    results = search_in_items(keypairs, query, 'keypairs')
-    print_search_results(results, query)
+    results = search_config(config, query, ['keypairs'])
+    print_search_results(results, query, output_format)
 
 @click.command()
-@click.option('--query', '-q', required=True, help='Search query for environment alias')
-def environment(query):
+@click.argument('expressions', nargs=-1)
+@click.option('--query', '-q', help='Search query for environment alias')
+@format_option
+@click.pass_context
+def environment(ctx, expressions, query, output_format):
+    """Search environments by alias or by their resolved components.
+
+    EXPRESSIONS are terms that must all match, e.g.
+    host~10.0. user=root proxy=bastion-eu key=deploy. Fields are alias,
+    host, port, user, key, proxy and password (aliases only); host, user
+    and key also match the address, username and key path. Use = for
+    exact, != for not equal and ~ for substring matches; an empty value
+    (proxy=) matches environments without one.
+    """
+    output_format = group_defaults(ctx, output_format=output_format)['output_format']
     config = load_config()
-    environments = config.get('environments', [])
-    results = search_in_items(environments, query, 'environments')
-    print_search_results(results, query)
+    if query and not expressions and output_format == 'table':
+        results = search_config(config, query, ['environments'])
+        print_search_results(results, query)
+        return
+    
+    try:
+        terms = parse_query(expressions + ((query,) if query else ()))
+    except ValueError as e:
+        click.echo(f"Error: {e}")
+        ctx.exit(2)
+    
+    matches = load_environment_index(config).query(terms)
+    if output_format != 'table':
+        echo_lines(record_lines(matches, output_format, ENVIRONMENT_FIELDS), pager=False)
+        return
+    
+    label = ' '.join(expressions + ((query,) if query else ())) or '*'
+    if not matches:
+        click.echo(f"No environments match: '{label}'")
+        return
+    
+    table_data = [
+        [
+            env['alias'],
+            f"{env['host']} ({', '.join(env['addresses'])})" if env['addresses'] else env['host'],
+            env['port'],
+            env['user'],
+            env['keypair_alias'],
+            '****' if env['password_alias'] else None,
+            env['proxy'],
+        ]
+        for env in matches
+    ]
+    click.echo(f"\nEnvironments matching '{label}':")
+    click.echo(tabulate(table_data, headers=['Alias', 'Host', 'Port', 'User', 'Key', 'Password', 'Proxy'], tablefmt='grid'))
+    click.echo(f"\nTotal: {len(matches)} environment(s) found")
 
 find.add_command(host)
 
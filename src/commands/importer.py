@@ -0,0 +1,77 @@
+import click
+import os
+from src.util.config_util import load_config, save_config
+from src.util.inventory_util import (
+    apply_import,
+    build_import_entries,
+    load_import_state,
+    read_ansible_inventory,
+    read_ssh_config,
+    save_import_state,
+)
+
+def run_import(path, reader, dry_run, force):
+    path = os.path.abspath(os.path.expanduser(path))
+    if not os.path.exists(path):
+        click.echo(f"Error: File '{path}' does not exist.")
+        return
+
+    try:
+        source = reader(path)
+    except (OSError, ValueError) as e:
+        click.echo(f"Error: Could not read '{path}': {e}")
+        return
+
+    state = load_import_state()
+    previous = state.get(path, {})
+    if not force and previous.get('digest') == source.digest:
+        click.echo(f"No changes in '{path}' since the last import.")
+        return
+
+    entries = build_import_entries(source)
+    config = load_config()
+    summary, digests, warnings = apply_import(config, entries, previous.get('entries', {}))
+
+    for warning in source.warnings + warnings:
+        click.echo(f"Warning: {warning}")
+
+    click.echo(
+        f"{'Would import' if dry_run else 'Imported'} {len(source.records)} host(s) from '{path}': "
+        f"{summary['added']} added, {summary['changed']} changed, "
+        f"{summary['removed']} removed, {summary['unchanged']} unchanged."
+    )
+    if dry_run:
+        return
+
+    if summary['added'] or summary['changed'] or summary['removed']:
+        save_config(config)
+    state[path] = {'digest': source.digest, 'entries': digests}
+    save_import_state(state)
+
+@click.group(name='import')
+def import_():
+    """Import or resync hosts from an OpenSSH config or Ansible inventory.
+
+    Entries created by an import are tracked per source file. Re-running
+    the import only applies what was added, changed or removed since.
+    """
+    pass
+
+@click.command(name='ssh-config')
+@click.argument('path', required=False, default='~/.ssh/config')
+@click.option('--dry-run', is_flag=True, help='Show what would change without saving.')
+@click.option('--force', is_flag=True, help='Diff the entries even if the file is unchanged.')
+def ssh_config(path, dry_run, force):
+    """Import Host blocks from an OpenSSH client config (default: ~/.ssh/config)."""
+    run_import(path, read_ssh_config, dry_run, force)
+
+@click.command()
+@click.argument('path', required=True)
+@click.option('--dry-run', is_flag=True, help='Show what would change without saving.')
+@click.option('--force', is_flag=True, help='Diff the entries even if the file is unchanged.')
+def ansible(path, dry_run, force):
+    """Import hosts from an Ansible INI or YAML inventory."""
+    run_import(path, read_ansible_inventory, dry_run, force)
+
+import_.add_command(ssh_config)
+import_.add_command(ansible)
@@ -1,119 +1,213 @@
 import click
-from tabulate import tabulate
+from itertools import chain, islice
+from typing import Iterator
 from src.util.config_util import load_config
+from src.util.table_util import cell_text, echo_lines, format_option, group_defaults, record_lines, table_lines
 
-def print_table(title, headers, rows):
-    if rows:
-        click.echo(f"\n{title}:")
-        click.echo(tabulate(rows, headers=headers, tablefmt="grid"))
-    else:
-        click.echo(f"\n{title}: No data available")
+def environment_components(e) -> str:
+    components = []
+    if e.get('host_alias'):
+        components.append(f"host:{e['host_alias']}")
+    if e.get('port_alias'):
+        components.append(f"port:{e['port_alias']}")
+    if e.get('username_alias'):
+        components.append(f"user:{e['username_alias']}")
+    if e.get('password_alias'):
+        components.append(f"pwd:****")
+    if e.get('keypair_alias'):
+        components.append(f"key:{e['keypair_alias']}")
+    if e.get('proxy_alias'):
+        components.append(f"proxy:{e['proxy_alias']}")
+    return ', '.join(components)
+
+# Per category: title, then (key, header, getter, shown by default) per column.
+TABLES = {
+    'hosts': ("HOSTS", [
+        ('alias', "Alias", lambda h: h['alias'], True),
+        ('address', "Address", lambda h: h['address'], True),
+        ('alternates', "Alternates", lambda h: h.get('alternate_addresses') or [], True),
+    ]),
+    'ports': ("PORTS", [
+        ('alias', "Alias", lambda p: p['alias'], True),
+        ('value', "Value", lambda p: p['value'], True),
+    ]),
+    'usernames': ("USERNAMES", [
+        ('alias', "Alias", lambda u: u['alias'], True),
+        ('value', "Value", lambda u: u['value'], True),
+    ]),
+    # masking passwords for security
+    'passwords': ("PASSWORDS", [
+        ('alias', "Alias", lambda p: p['alias'], True),
+        ('value', "Value (masked)", lambda p: '****', True),
+    ]),
+    'keypairs': ("KEYPAIRS", [
+        ('alias', "Alias", lambda k: k['alias'], True),
+        ('path', "Path", lambda k: k['path'], True),
+    ]),
+    'environments': ("ENVIRONMENTS", [
+        ('alias', "Alias", lambda e: e['alias'], True),
+        ('components', "Components", environment_components, True),
+        ('host', "Host", lambda e: e.get('host_alias'), False),
+        ('port', "Port", lambda e: e.get('port_alias'), False),
+        ('user', "User", lambda e: e.get('username_alias'), False),
+        ('password', "Password", lambda e: '****' if e.get('password_alias') else None, False),
+        ('key', "Key", lambda e: e.get('keypair_alias'), False),
+        ('proxy', "Proxy", lambda e: e.get('proxy_alias'), False),
+    ]),
+}
+
+def _sort_key(value):
+    if isinstance(value, (int, float)):
+        return (0, value, '')
+    return (1, 0, cell_text(value).lower())
+
+def _select_columns(category, columns, every=False) -> list:
+    """Return the columns picked by --columns, else the default (or `every`) ones."""
+    table_columns = TABLES[category][1]
+    keys = {column[0]: column for column in table_columns}
+    if not columns:
+        return [column for column in table_columns if every or column[3]]
+    unknown = [key for key in columns if key not in keys]
+    if unknown:
+        raise click.BadParameter(f"unknown column '{unknown[0]}' for {category}; choose from {', '.join(keys)}.", param_hint="'--columns'")
+    return [keys[key] for key in columns]
+
+def _window(config, category, limit, offset, sort):
+    # The entries to show, in order, plus the total and the end of the window.
+    items = config.entries(category)
+    total = len(items)
+    if sort:
+        keys = {column[0]: column for column in TABLES[category][1]}
+        key = sort.lstrip('-')
+        if key not in keys:
+            raise click.BadParameter(f"unknown column '{key}' for {category}; choose from {', '.join(keys)}.", param_hint="'--sort'")
+        getter = keys[key][2]
+        items = sorted(items, key=lambda item: _sort_key(getter(item)), reverse=sort.startswith('-'))
+    end = None if limit is None else offset + limit
+    return items, total, end
+
+def table_section(config, category, limit=None, offset=0, sort=None, columns=None) -> Iterator[str]:
+    """Return the lines of one category's table as a lazy iterator.
+
+    Raises click.BadParameter for a --sort or --columns key the table
+    does not have.
+    """
+    title = TABLES[category][0]
+    selected = _select_columns(category, columns)
+    items, total, end = _window(config, category, limit, offset, sort)
 
-def show_all_info():
+    def rows():
+        for item in islice(items, offset, end):
+            yield [getter(item) for _, _, getter, _ in selected]
+
+    if not total:
+        return iter([f"\n{title}: No data available"])
+    stop = total if end is None else min(end, total)
+    if offset >= stop:
+        return iter([f"\n{title}: No rows after offset {offset} ({total} in total)"])
+    footer = [f"Rows {offset + 1}-{stop} of {total}."] if limit is not None or offset else []
+    return chain([f"\n{title}:"], table_lines([column[1] for column in selected], rows), footer)
+
+def record_section(config, category, limit=None, offset=0, sort=None, columns=None):
+    """Return the field names and a lazy iterator of one category's entries as dicts.
+
+    Records carry every column unless `columns` picks some, plus a
+    `type` field. Passwords stay masked as in the table.
+    """
+    selected = _select_columns(category, columns, every=True)
+    items, _, end = _window(config, category, limit, offset, sort)
+    kind = category.rstrip('s')
+    records = (
+        dict([('type', kind)] + [(key, getter(item)) for key, _, getter, _ in selected])
+        for item in islice(items, offset, end)
+    )
+    return [column[0] for column in selected], records
+
+def list_options(f):
+    """Options shared by every list command."""
+    f = format_option(f)
+    f = click.option('--no-pager', is_flag=True, help='Never pipe the output through a pager.')(f)
+    f = click.option('--columns', '-c', help='Comma-separated columns to show, e.g. alias,host,proxy.')(f)
+    f = click.option('--sort', '-s', help='Column to sort by; prefix with - for descending order.')(f)
+    f = click.option('--offset', type=click.IntRange(min=0), default=0, help='Number of rows to skip.')(f)
+    f = click.option('--limit', '-n', type=click.IntRange(min=0), help='Maximum number of rows to show.')(f)
+    return f
+
+def show_tables(categories, limit, offset, sort, columns, no_pager, output_format):
     config = load_config()
-    
-    host_rows = [[h['alias'], h['address']] for h in config.get('hosts', [])]
-    print_table("HOSTS", ["Alias", "Address"], host_rows)
-    
-    port_rows = [[p['alias'], p['value']] for p in config.get('ports', [])]
-    print_table("PORTS", ["Alias", "Value"], port_rows)
-    
-    username_rows = [[u['alias'], u['value']] for u in config.get('usernames', [])]
-    print_table("USERNAMES", ["Alias", "Value"], username_rows)
-    
-    password_rows = [[p['alias'], '****'] for p in config.get('passwords', [])]
-    print_table("PASSWORDS", ["Alias", "Value (masked)"], password_rows)
-    
-    keypair_rows = [[k['alias'], k['path']] for k in config.get('keypairs', [])]
-    print_table("KEYPAIRS", ["Alias", "Path"], keypair_rows)
-    
-    # Environments
-    env_rows = []
-    for e in config.get('environments', []):
-        components = []
-        if e.get('host_alias'):
-            components.append(f"host:{e['host_alias']}")
-        if e.get('port_alias'):
-            components.append(f"port:{e['port_alias']}")
-        if e.get('username_alias'):
-            components.append(f"user:{e['username_alias']}")
-        if e.get('password_alias'):
-            components.append(f"pwd:****")
-        if e.get('keypair_alias'):
-            components.append(f"key:{e['keypair_alias']}")
-        if e.get('proxy_alias'):
-            components.append(f"proxy:{e['proxy_alias']}")
-        
-        env_rows.append([e['alias'], ', '.join(components)])
-    
-    print_table("ENVIRONMENTS", ["Alias", "Components"], env_rows)
+    columns = [column.strip() for column in columns.split(',')] if columns else None
+    if len(categories) == 1:
+        plans = [(categories[0], columns, sort)]
+    else:
+        # Across every table, keys only apply where the table has them.
+        plans = []
+        for category in categories:
+            keys = [column[0] for column in TABLES[category][1]]
+            table_columns = [key for key in columns if key in keys] if columns else None
+            table_sort = sort if sort and sort.lstrip('-') in keys else None
+            plans.append((category, table_columns or None, table_sort))
+
+    if output_format == 'table':
+        sections = [table_section(config, category, limit, offset, table_sort, table_columns) for category, table_columns, table_sort in plans]
+        echo_lines(chain.from_iterable(sections), pager=not no_pager)
+        return
+
+    fields, sections = ['type'], []
+    for category, table_columns, table_sort in plans:
+        section_fields, records = record_section(config, category, limit, offset, table_sort, table_columns)
+        fields += [field for field in section_fields if field not in fields]
+        sections.append(records)
+    echo_lines(record_lines(chain.from_iterable(sections), output_format, fields), pager=False)
 
 @click.group(invoke_without_command=True)
+@list_options
 @click.pass_context
-def list(ctx):
+def list(ctx, limit, offset, sort, columns, no_pager, output_format):
     """List stored SSH connection information."""
     if ctx.invoked_subcommand is None:
-        show_all_info()
+        show_tables(['hosts', 'ports', 'usernames', 'passwords', 'keypairs', 'environments'], limit, offset, sort, columns, no_pager, output_format)
 
 @click.command()
-def host():
+@list_options
+@click.pass_context
+def host(ctx, **options):
     """List all stored hosts."""
-    config = load_config()
-    host_rows = [[h['alias'], h['address']] for h in config.get('hosts', [])]
-    print_table("HOSTS", ["Alias", "Address"], host_rows)
+    show_tables(['hosts'], **group_defaults(ctx, **options))
 
 @click.command()
-def port():
+@list_options
+@click.pass_context
+def port(ctx, **options):
     """List all stored ports."""
-    config = load_config()
-    port_rows = [[p['alias'], p['value']] for p in config.get('ports', [])]
-    print_table("PORTS", ["Alias", "Value"], port_rows)
+    show_tables(['ports'], **group_defaults(ctx, **options))
 
 @click.command()
-def username():
+@list_options
+@click.pass_context
+def username(ctx, **options):
     """List all stored usernames."""
-    config = load_config()
-    username_rows = [[u['alias'], u['value']] for u in config.get('usernames', [])]
-    print_table("USERNAMES", ["Alias", "Value"], username_rows)
+    show_tables(['usernames'], **group_defaults(ctx, **options))
 
 @click.command()
-def password():
+@list_options
+@click.pass_context
+def password(ctx, **options):
     """List all stored passwords (masked for security)."""
-    config = load_config()
-    # masking passwords for security
-    password_rows = [[p['alias'], '****'] for p in config.get('passwords', [])]
-    print_table("PASSWORDS", ["Alias", "Value (masked)"], password_rows)
+    show_tables(['passwords'], **group_defaults(ctx, **options))
 
 @click.command()
-def keypair():
+@list_options
+@click.pass_context
+def keypair(ctx, **options):
     """List all stored keypairs."""
-    config = load_config()
-    keypair_rows = [[k['alias'], k['path']] for k in config.get('keypairs', [])]
-    print_table("KEYPAIRS", ["Alias", "Path"], keypair_rows)
+    show_tables(['keypairs'], **group_defaults(ctx, **options))
 
 @click.command()
-def environment():
-    config = load_config()
-    env_rows = []
-    
-    for e in config.get('environments', []):
-        components = []
-        if e.get('host_alias'):
-            components.append(f"host:{e['host_alias']}")
-        if e.get('port_alias'):
-            components.append(f"port:{e['port_alias']}")
-        if e.get('username_alias'):
-            components.append(f"user:{e['username_alias']}")
-        if e.get('password_alias'):
-            components.append(f"pwd:****")
-        if e.get('keypair_alias'):
-            components.append(f"key:{e['keypair_alias']}")
-        if e.get('proxy_alias'):
-            components.append(f"proxy:{e['proxy_alias']}")
-        
-        env_rows.append([e['alias'], ', '.join(components)])
-    
-    print_table("ENVIRONMENTS", ["Alias", "Components"], env_rows)
+@list_options
+@click.pass_context
+def environment(ctx, **options):
+    """List all stored environments."""
+    show_tables(['environments'], **group_defaults(ctx, **options))
 
 list.add_command(host)
 
@@ -129,4 +223,4 @@ list.add_command(keypair)
 list.add_command(keypair, name='kp')
 
 list.add_command(environment)
-list.add_command(environment, name='env')
\ No newline at end of file
+list.add_command(environment, name='env')
@@ -0,0 +1,105 @@
+import click
+import json
+from tabulate import tabulate
+from src.util.config_util import load_config, resolve_port
+from src.util.probe_util import DEFAULT_PROBE_TIMEOUT, MAX_PROBE_CONCURRENCY, host_addresses, percentile, probe_all
+
+def collect_targets(config, env_aliases=()) -> dict:
+    """Map each (address, port) pair to the environments or hosts that use it.
+
+    With no `env_aliases`, every environment is included, plus hosts that
+    no environment references (on port 22).
+    """
+    targets = {}
+    used_hosts = set()
+    for env in config.entries('environments'):
+        if env_aliases and env['alias'] not in env_aliases:
+            continue
+        host = config.lookup('hosts', env['host_alias'])
+        if host is None:
+            continue
+        used_hosts.add(host['alias'])
+        port = resolve_port(config, env.get('port_alias'))
+        for address in host_addresses(host):
+            targets.setdefault((address, port), []).append(env['alias'])
+
+    if not env_aliases:
+        for host in config.entries('hosts'):
+            if host['alias'] not in used_hosts:
+                for address in host_addresses(host):
+                    targets.setdefault((address, 22), []).append(host['alias'])
+    return targets
+
+def format_targets(names: list, limit: int = 3) -> str:
+    shown = ', '.join(names[:limit])
+    return f"{shown} (+{len(names) - limit} more)" if len(names) > limit else shown
+
+@click.command()
+@click.argument('env_aliases', nargs=-1)
+@click.option('--timeout', '-t', type=click.FloatRange(min=0.1), default=DEFAULT_PROBE_TIMEOUT, show_default=True, help='Seconds to wait for each connection.')
+@click.option('--concurrency', '-c', type=click.IntRange(min=1), help=f'Maximum number of connections in flight. Defaults to as many as the open-file limit allows, up to {MAX_PROBE_CONCURRENCY}.')
+@click.option('--banner', is_flag=True, help='Read the SSH banner and report hosts that do not speak SSH.')
+@click.option('--format', 'output_format', type=click.Choice(['table', 'json']), default='table', show_default=True, help='Output format.')
+@click.option('--failures', is_flag=True, help='Only show hosts that could not be reached.')
+@click.pass_context
+def ping(ctx, env_aliases, timeout, concurrency, banner, output_format, failures):
+    """Check which hosts accept connections and how fast.
+
+    Probes every address and port of every environment (or only ENV_ALIASES)
+    concurrently, plus hosts not used by any environment on port 22.
+    """
+    config = load_config()
+    missing = [alias for alias in env_aliases if not config.contains('environments', alias)]
+    for alias in missing:
+        click.echo(f"Error: Environment with alias '{alias}' not found.")
+    if missing:
+        ctx.exit(2)
+
+    targets = collect_targets(config, set(env_aliases))
+    if not targets:
+        click.echo("No hosts to probe.")
+        return
+
+    results = probe_all(list(targets), timeout=timeout, concurrency=concurrency, banner=banner)
+    for result in results:
+        result['targets'] = targets[(result['address'], result['port'])]
+
+    latencies = [r['latency_ms'] for r in results if r['latency_ms'] is not None]
+    reachable = sum(1 for r in results if r['status'] == 'ok')
+    summary = {
+        'probed': len(results),
+        'reachable': reachable,
+        'failed': len(results) - reachable,
+        'p50_ms': percentile(latencies, 50),
+        'p90_ms': percentile(latencies, 90),
+        'p99_ms': percentile(latencies, 99),
+        'max_ms': max(latencies) if latencies else None,
+    }
+    shown = [r for r in results if r['status'] != 'ok'] if failures else results
+
+    if output_format == 'json':
+        click.echo(json.dumps({'results': shown, 'summary': summary}, indent=4, ensure_ascii=False))
+    else:
+        shown = sorted(shown, key=lambda r: (r['status'] == 'ok', r['latency_ms'] or 0))
+        rows = [
+            [
+                format_targets(r['targets']),
+                f"[{r['address']}]:{r['port']}" if ':' in r['address'] else f"{r['address']}:{r['port']}",
+                r['status'] if not r['error'] else f"{r['status']}: {r['error']}",
+                r['latency_ms'] if r['latency_ms'] is not None else 'N/A',
+            ] + ([r['banner'] or 'N/A'] if banner else [])
+            for r in shown
+        ]
+        headers = ["Target", "Address", "Status", "Latency (ms)"] + (["Banner"] if banner else [])
+        if rows:
+            click.echo(tabulate(rows, headers=headers, tablefmt="grid"))
+
+        def fmt(value):
+            return 'N/A' if value is None else f"{value:.1f}ms"
+
+        click.echo(f"\n{reachable}/{len(results)} reachable. "
+                   f"Latency p50 {fmt(summary['p50_ms'])}, p90 {fmt(summary['p90_ms'])}, "
+                   f"p99 {fmt(summary['p99_ms'])}, max {fmt(summary['max_ms'])}.")
+
+    if summary['failed']:
+        ctx.exit(1)
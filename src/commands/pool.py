@@ -0,0 +1,134 @@
+import click
+import os
+from tabulate import tabulate
+from src.util.config_util import load_config, save_config
+from src.util.mux_util import (
+    CONTROL_DIR,
+    CONTROL_PERSIST_PATTERN,
+    DEFAULT_CONTROL_PERSIST,
+    control_path,
+    control_persist,
+    exit_master,
+    master_pid,
+    session_counts,
+)
+
+def pooled_sockets(config, env_alias=None) -> list:
+    """Return (alias, socket path) for each master socket on disk."""
+    if not os.path.isdir(CONTROL_DIR):
+        return []
+    aliases = {control_path(e['alias']): e['alias'] for e in config.entries('environments')}
+    sockets = []
+    for name in sorted(os.listdir(CONTROL_DIR)):
+        path = os.path.join(CONTROL_DIR, name)
+        alias = aliases.get(path)
+        if env_alias is None or alias == env_alias:
+            sockets.append((alias, path))
+    return sockets
+
+@click.group()
+def pool():
+    """Manage the shared SSH master connections used by connect and tunnel."""
+    pass
+
+@click.command(name='list')
+def list_():
+    """List master connections and their sessions."""
+    config = load_config()
+    sockets = pooled_sockets(config)
+    if not sockets:
+        click.echo("No master connections.")
+        return
+
+    counts = session_counts([path for _, path in sockets])
+    rows = []
+    for alias, path in sockets:
+        env = config.lookup('environments', alias) if alias else None
+        pid = master_pid(path)
+        rows.append([
+            alias or 'N/A',
+            'running' if pid is not None else 'stale',
+            pid or 'N/A',
+            max(counts[path] - 1, 0) if pid is not None else 0,
+            control_persist(env) if env else 'N/A',
+            path,
+        ])
+    click.echo(tabulate(rows, headers=["Environment", "Status", "PID", "Sessions", "TTL", "Socket"], tablefmt="grid"))
+
+@click.command()
+@click.argument('env_alias', required=False)
+def check(env_alias):
+    """Check that master sockets respond and remove stale ones."""
+    config = load_config()
+    sockets = pooled_sockets(config, env_alias)
+    if not sockets:
+        click.echo("No master connections.")
+        return
+
+    for alias, path in sockets:
+        pid = master_pid(path)
+        if pid is not None:
+            click.echo(f"✓ {alias or path}: master running (pid {pid})")
+            continue
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        click.echo(f"✗ {alias or path}: not responding, removed stale socket")
+
+@click.command()
+@click.argument('env_alias', required=True)
+@click.argument('value', required=True)
+def ttl(env_alias, value):
+    """Set how long an idle master for ENV_ALIAS stays open.
+
+    VALUE is an ssh ControlPersist time such as 30s, 10m or 2h, 'yes' to keep
+    it open until evicted, 'no' to close it with the last session, or 'off'
+    to stop sharing connections for this environment. 'default' restores the
+    default of 10m.
+    """
+    config = load_config()
+    if not config.contains('environments', env_alias):
+        click.echo(f"Error: Environment with alias '{env_alias}' not found.")
+        return
+
+    if value == 'default':
+        value = None
+    elif not CONTROL_PERSIST_PATTERN.match(value):
+        click.echo(f"Error: Invalid TTL '{value}'. Use a time such as 30s, 10m or 2h, or yes, no, off, default.")
+        return
+
+    config.update('environments', env_alias, control_persist=value)
+    save_config(config)
+    click.echo(f"TTL for '{env_alias}' set to {value or DEFAULT_CONTROL_PERSIST}.")
+    click.echo("Running masters keep their TTL until they are evicted.")
+
+@click.command()
+@click.argument('env_alias', required=False)
+@click.option('--idle', is_flag=True, help='Only evict masters without open sessions.')
+def evict(env_alias, idle):
+    """Close master connections (all, or those of ENV_ALIAS)."""
+    config = load_config()
+    sockets = pooled_sockets(config, env_alias)
+    if not sockets:
+        click.echo("No master connections.")
+        return
+
+    counts = session_counts([path for _, path in sockets]) if idle else {}
+    evicted = 0
+    for alias, path in sockets:
+        if idle and counts[path] > 1:
+            continue
+        if exit_master(path):
+            click.echo(f"✓ Closed master for {alias or path}")
+            evicted += 1
+        elif os.path.exists(path):
+            os.remove(path)
+            click.echo(f"✓ Removed stale socket for {alias or path}")
+            evicted += 1
+    click.echo(f"\nEvicted {evicted} master connection(s).")
+
+pool.add_command(list_)
+pool.add_command(check)
+pool.add_command(ttl)
+pool.add_command(evict)
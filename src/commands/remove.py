@@ -2,6 +2,25 @@ import click
 import os
 from src.util.config_util import SECRETS_DIR, load_config, save_config
 
+LABELS = {'environments': 'Environment', 'tunnel_profiles': 'Tunnel profile'}
+
+def remove_dependents(config, category, alias, cascade) -> bool:
+    """Remove what depends on an entry if `cascade`, else report it.
+
+    Returns False if dependents block the removal.
+    """
+    dependents = config.dependents(category, alias)
+    if dependents and not cascade:
+        click.echo(f"Error: '{alias}' is still used by:")
+        for dep_category, dep_alias in dependents:
+            click.echo(f"  - {LABELS[dep_category].lower()} '{dep_alias}'")
+        click.echo("Change them first, or use --cascade to remove them as well.")
+        return False
+    for dep_category, dep_alias in dependents:
+        config.remove(dep_category, dep_alias)
+        click.echo(f"{LABELS[dep_category]} '{dep_alias}' has been removed.")
+    return True
+
 @click.group()
 def remove():
     """Remove a stored component by alias."""
@@ -9,78 +28,80 @@ def remove():
 
 @click.command()
 @click.option('--alias', '-l', required=True, help='Host alias to remove.')
-def host(alias):
+@click.option('--cascade', is_flag=True, help='Also remove the entries that depend on it.')
+def host(alias, cascade):
     config = load_config()
     
-    hosts = config.get('hosts', [])
-    original_length = len(hosts)
-    config['hosts'] = [h for h in hosts if h['alias'] != alias]
-    
-    if len(config['hosts']) < original_length:
-        save_config(config)
-        click.echo(f"Host with alias '{alias}' has been removed.")
-    else:
+    if not config.contains('hosts', alias):
         click.echo(f"Error: Host with alias '{alias}' not found.")
+        return
+    
+    if not remove_dependents(config, 'hosts', alias, cascade):
+        return
+    config.remove('hosts', alias)
+    save_config(config)
+    click.echo(f"Host with alias '{alias}' has been removed.")
 
 @click.command()
 @click.option('--alias', '-l', required=True, help='Port alias to remove.')
-def port(alias):
+@click.option('--cascade', is_flag=True, help='Also remove the entries that depend on it.')
+def port(alias, cascade):
     config = load_config()
     
-    ports = config.get('ports', [])
-    original_length = len(ports)
-    config['ports'] = [p for p in ports if p['alias'] != alias]
-    
-    if len(config['ports']) < original_length:
-        save_config(config)
-        click.echo(f"Port with alias '{alias}' has been removed.")
-    else:
+    if not config.contains('ports', alias):
         click.echo(f"Error: Port with alias '{alias}' not found.")
+        return
+    
+    if not remove_dependents(config, 'ports', alias, cascade):
+        return
+    config.remove('ports', alias)
+    save_config(config)
+    click.echo(f"Port with alias '{alias}' has been removed.")
 
 @click.command()
 @click.option('--alias', '-l', required=True, help='Username alias to remove.')
-def username(alias):
+@click.option('--cascade', is_flag=True, help='Also remove the entries that depend on it.')
+def username(alias, cascade):
     config = load_config()
     
-    usernames = config.get('usernames', [])
-    original_length = len(usernames)
-    config['usernames'] = [u for u in usernames if u['alias'] != alias]
-    
-    if len(config['usernames']) < original_length:
-        save_config(config)
-        click.echo(f"Username with alias '{alias}' has been removed.")
-    else:
+    if not config.contains('usernames', alias):
         click.echo(f"Error: Username with alias '{alias}' not found.")
+        return
+    
+    if not remove_dependents(config, 'usernames', alias, cascade):
+        return
+    config.remove('usernames', alias)
+    save_config(config)
+    click.echo(f"Username with alias '{alias}' has been removed.")
 
 @click.command()
 @click.option('--alias', '-l', required=True, help='Password alias to remove.')
-def password(alias):
+@click.option('--cascade', is_flag=True, help='Also remove the entries that depend on it.')
+def password(alias, cascade):
     config = load_config()
     
-    passwords = config.get('passwords', [])
-    original_length = len(passwords)
-    config['passwords'] = [p for p in passwords if p['alias'] != alias]
-    
-    if len(config['passwords']) < original_length:
-        save_config(config)
-        click.echo(f"Password with alias '{alias}' has been removed.")
-    else:
+    if not config.contains('passwords', alias):
         click.echo(f"Error: Password with alias '{alias}' not found.")
+        return
+    
+    if not remove_dependents(config, 'passwords', alias, cascade):
+        return
+    config.remove('passwords', alias)
+    save_config(config)
+    click.echo(f"Password with alias '{alias}' has been removed.")
 
 @click.command()
 @click.option('--alias', '-l', required=True, help='Keypair alias to remove.')
-def keypair(alias):
+@click.option('--cascade', is_flag=True, help='Also remove the entries that depend on it.')
+def keypair(alias, cascade):
     config = load_config()
     
-    keypairs = config.get('keypairs', [])
-    keypair_to_remove = None
-    
-    for kp in keypairs:
-        if kp['alias'] == alias:
-            keypair_to_remove = kp
-            break
+    keypair_to_remove = config.lookup('keypairs', alias)
     
     if keypair_to_remove:
+        if not remove_dependents(config, 'keypairs', alias, cascade):
+            return
+        
         keypair_path = keypair_to_remove['path']
         
         if keypair_path.startswith('src/secrets/'): 
@@ -94,7 +115,7 @@ def keypair(alias):
                 except Exception as e:
                     click.echo(f"Warning: Could not remove keypair file: {e}")
         
-        config['keypairs'] = [kp for kp in keypairs if kp['alias'] != alias]
+        config.remove('keypairs', alias)
         save_config(config)
         click.echo(f"Keypair with alias '{alias}' has been removed.")
     else:
@@ -102,18 +123,19 @@ def keypair(alias):
 
 @click.command()
 @click.option('--alias', '-l', required=True, help='Environment alias to remove.')
-def environment(alias):
+@click.option('--cascade', is_flag=True, help='Also remove the entries that depend on it.')
+def environment(alias, cascade):
     config = load_config()
     
-    environments = config.get('environments', [])
-    original_length = len(environments)
-    config['environments'] = [e for e in environments if e['alias'] != alias]
-    
-    if len(config.get('environments', [])) < original_length:
-        save_config(config)
-        click.echo(f"Environment with alias '{alias}' has been removed.")
-    else:
+    if not config.contains('environments', alias):
         click.echo(f"Error: Environment with alias '{alias}' not found.")
+        return
+    
+    if not remove_dependents(config, 'environments', alias, cascade):
+        return
+    config.remove('environments', alias)
+    save_config(config)
+    click.echo(f"Environment with alias '{alias}' has been removed.")
 
 remove.add_command(host)
 
@@ -0,0 +1,72 @@
+import click
+import os
+from src.util import config_util
+from src.util.config_util import CATEGORIES, load_config, save_config, storage_mode
+
+def _normalized(data: dict) -> dict:
+    """Drop the version and unset fields so both stores compare equal."""
+    return {
+        key: [{k: v for k, v in entry.items() if v is not None} for entry in value] if key in CATEGORIES else value
+        for key, value in data.items()
+        if key != 'version'
+    }
+
+def _backup(path):
+    if os.path.exists(path):
+        os.replace(path, path + '.bak')
+
+@click.group()
+def storage():
+    """Inspect or migrate the configuration storage backend."""
+    pass
+
+@click.command()
+def status():
+    """Show the active storage backend and entry counts."""
+    mode = storage_mode()
+    config = load_config()
+    click.echo(f"Storage: {mode}")
+    click.echo(f"Version: {config.version}")
+    for category in CATEGORIES:
+        click.echo(f"  {category}: {len(config.entries(category))}")
+
+@click.command()
+@click.option('--to', 'target', type=click.Choice(['json', 'sqlite']), required=True, help='Storage backend to migrate to.')
+def migrate(target):
+    """Copy the configuration into another storage backend."""
+    source_mode = 'sqlite' if os.path.exists(config_util.DB_PATH) else 'json'
+    if source_mode == target:
+        click.echo(f"Error: Configuration is already stored as {target}.")
+        return
+
+    source = load_config(source_mode)
+
+    if target == 'sqlite':
+        from src.util.sqlite_store import create_database
+        migrated = create_database(source)
+    else:
+        save_config(config_util.Config(source.to_dict()), storage='json')
+        migrated = load_config('json')
+
+    if _normalized(migrated.to_dict()) != _normalized(source.to_dict()):
+        if target == 'sqlite':
+            os.remove(config_util.DB_PATH)
+        click.echo("Error: Migrated configuration does not match the source. Nothing was changed.")
+        return
+
+    # Keep the old store as a backup so the new one is picked up from now on.
+    if target == 'sqlite':
+        _backup(config_util.CONFIG_PATH)
+        _backup(config_util.JOURNAL_PATH)
+        if os.path.exists(config_util.SNAPSHOT_PATH):
+            os.remove(config_util.SNAPSHOT_PATH)
+        click.echo(f"Configuration migrated to SQLite at '{config_util.DB_PATH}'.")
+    else:
+        _backup(config_util.DB_PATH)
+        click.echo(f"Configuration migrated to JSON at '{config_util.CONFIG_PATH}'.")
+
+    total = sum(len(migrated.entries(category)) for category in CATEGORIES)
+    click.echo(f"  {total} entries copied.")
+
+storage.add_command(status)
+storage.add_command(migrate)
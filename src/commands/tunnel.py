@@ -1,51 +1,59 @@
 import click
+import os
+import sys
+import time
+import signal
+import asyncio
 import subprocess
 from typing import Optional
-from src.util.config_util import load_config, SECRETS_DIR
-import os
+from src.commands.connect import mask_command
+from src.util.config_util import Config, load_config, save_config
+from src.util.probe_util import host_addresses
+from src.util.resolver_util import Resolver
+from src.util.supervisor_util import SUPERVISOR_START_TIMEOUT, TunnelSupervisor
+from src.util.table_util import echo_lines, format_option, group_defaults, record_lines
+from src.util.tunnel_util import (
+    DEFAULT_SOCKS_PORT,
+    TUNNEL_LOG_DIR,
+    TunnelError,
+    active_tunnels,
+    describe_forward,
+    discover_tunnels,
+    format_bytes,
+    forward_ports,
+    start_tunnel,
+    stop_tunnel,
+    tunnel_io,
+    unregister_tunnels,
+)
 from tabulate import tabulate
 
 @click.group()
 def tunnel():
-    """SSH tunnel commands for local and remote port forwarding."""
+    """SSH tunnel commands for local, remote and dynamic port forwarding."""
     pass
 
-def build_ssh_command(env_config: dict, config: dict, forwarding: Optional[str] = None) -> list:
+def build_ssh_command(env_config: dict, config: Config, forwards: Optional[list] = None, multiplex: bool = True) -> list:
     """Build the SSH command list based on environment config."""
-    host = next(h for h in config['hosts'] if h['alias'] == env_config['host_alias'])['address']
-    port = next((p for p in config.get('ports', []) if p['alias'] == env_config['port_alias']), {'value': 22})['value']
-    username = next((u['value'] for u in config.get('usernames', []) if u['alias'] == env_config['username_alias']), None)
-    password_alias = env_config.get('password_alias')
-    keypair_alias = env_config.get('keypair_alias')
-    proxy_alias = env_config.get('proxy_alias')
-
-    ssh_cmd = ['ssh']
-
-    if forwarding:
-        ssh_cmd.extend(['-N', '-f'])
-        ssh_cmd.append(forwarding)
-
-    if username:
-        ssh_cmd.extend(['-l', username])
-
-    ssh_cmd.extend(['-p', str(port)])
-
-    if keypair_alias:
-        keypair = next(k for k in config['keypairs'] if k['alias'] == keypair_alias)
-        key_path = os.path.join(SECRETS_DIR, os.path.basename(keypair['path']))
-        ssh_cmd.extend(['-i', key_path])
-    elif password_alias:
-        password = next(p['value'] for p in config['passwords'] if p['alias'] == password_alias)
-        ssh_cmd = ['sshpass', '-p', password] + ssh_cmd
+    return Resolver(config).connection(env_config, forwards, multiplex=multiplex)['command']
 
-    if proxy_alias:
-        proxy_env = next(e for e in config['environments'] if e['alias'] == proxy_alias)
-        proxy_cmd = build_ssh_command(proxy_env, config)[1:]
-        proxy_str = ' '.join(proxy_cmd[:-1]) + proxy_cmd[-1]
-        ssh_cmd.extend(['-J', proxy_str])
-
-    ssh_cmd.append(host)
-    return ssh_cmd
+def open_tunnel(config: Config, env_config: dict, forwards: list, **fields) -> Optional[dict]:
+    """Start and register a tunnel, reporting the outcome."""
+    # Tunnels keep a connection of their own: a forward opened through a
+    # shared master belongs to the master and would outlive the tunnel's PID.
+    try:
+        ssh_cmd = build_ssh_command(env_config, config, forwards, multiplex=False)
+    except ValueError as e:
+        click.echo(f"Error: {e}")
+        return None
+    click.echo(f"Executing: {' '.join(mask_command(ssh_cmd))}")
+    try:
+        record = start_tunnel(ssh_cmd, env_config['alias'], forwards, **fields)
+    except TunnelError as e:
+        click.echo(f"Error establishing tunnel: {e.message}")
+        return None
+    click.echo(f"Tunnel running with PID {record['pid']}.")
+    return record
 
 @click.command()
 @click.option('--env', '-e', required=True, help='Environment alias to use for the tunnel.')
@@ -55,24 +63,25 @@ def build_ssh_command(env_config: dict, config: dict, forwarding: Optional[str]
 def local(env, local_port, remote_host, remote_port):
     """Create a local port forwarding tunnel."""
     config = load_config()
-    env_config = next((e for e in config.get('environments', []) if e['alias'] == env), None)
+    env_config = config.lookup('environments', env)
     if not env_config:
         click.echo(f"Error: Environment '{env}' not found.")
         return
     
-    remote_address = next((h['address'] for h in config.get('hosts', []) if h['alias'] == remote_host), None)
-    if not remote_address:
+    remote_entry = config.lookup('hosts', remote_host)
+    if not remote_entry:
         click.echo(f"Error: Host alias '{remote_host}' not found.")
         return
     
-    forwarding = f'-L {local_port}:{remote_address}:{remote_port}'
-    ssh_cmd = build_ssh_command(env_config, config, forwarding)
-    click.echo(f"Executing: {' '.join(ssh_cmd)}")
-    try:
-        subprocess.run(ssh_cmd, check=True)
+    forward = {
+        'type': 'local',
+        'local_port': local_port,
+        'remote_host': remote_entry['address'],
+        'remote_alias': remote_host,
+        'remote_port': remote_port,
+    }
+    if open_tunnel(config, env_config, [forward]):
         click.echo("Local tunnel established.")
-    except subprocess.CalledProcessError as e:
-        click.echo(f"Error establishing tunnel: {e}")
 
 @click.command()
 @click.option('--env', '-e', required=True, help='Environment alias to use for the tunnel.')
@@ -82,120 +91,441 @@ def local(env, local_port, remote_host, remote_port):
 def remote(env, remote_port, local_host, local_port):
     """Create a remote port forwarding tunnel."""
     config = load_config()
-    env_config = next((e for e in config.get('environments', []) if e['alias'] == env), None)
+    env_config = config.lookup('environments', env)
     if not env_config:
         click.echo(f"Error: Environment '{env}' not found.")
         return
 
-    forwarding = f'-R {remote_port}:{local_host}:{local_port}'
-    ssh_cmd = build_ssh_command(env_config, config, forwarding)
-    click.echo(f"Executing: {' '.join(ssh_cmd)}")
-    try:
-        subprocess.run(ssh_cmd, check=True)
+    forward = {
+        'type': 'remote',
+        'remote_port': remote_port,
+        'local_host': local_host,
+        'local_port': local_port,
+    }
+    if open_tunnel(config, env_config, [forward]):
         click.echo("Remote tunnel established.")
-    except subprocess.CalledProcessError as e:
-        click.echo(f"Error establishing tunnel: {e}")
+
+def parse_forward(kind: str, spec: str, config: Config) -> dict:
+    """Parse a -L/-R/-D style forward spec into a forward dict.
+
+    The host of a local forward may be a host alias or an address.
+    """
+    parts = spec.split(':')
+    try:
+        if kind == 'dynamic' and len(parts) == 1:
+            return {'type': 'dynamic', 'local_port': int(parts[0])}
+        if kind == 'dynamic' and len(parts) == 2:
+            return {'type': 'dynamic', 'local_port': int(parts[1]), 'bind': parts[0]}
+        if kind == 'local' and len(parts) == 3:
+            host = config.lookup('hosts', parts[1])
+            return {
+                'type': 'local',
+                'local_port': int(parts[0]),
+                'remote_host': host['address'] if host else parts[1],
+                'remote_alias': parts[1] if host else None,
+                'remote_port': int(parts[2]),
+            }
+        if kind == 'remote' and len(parts) == 3:
+            return {'type': 'remote', 'remote_port': int(parts[0]), 'local_host': parts[1], 'local_port': int(parts[2])}
+    except ValueError:
+        pass
+    formats = {'local': 'LOCAL_PORT:HOST:REMOTE_PORT', 'remote': 'REMOTE_PORT:LOCAL_HOST:LOCAL_PORT', 'dynamic': '[BIND_ADDRESS:]LOCAL_PORT'}
+    raise click.BadParameter(f"'{spec}' is not a valid {kind} forward. Use {formats[kind]}.")
+
+def parse_forwards(config: Config, local_specs=(), remote_specs=(), dynamic_specs=()) -> list:
+    return (
+        [parse_forward('local', spec, config) for spec in local_specs]
+        + [parse_forward('remote', spec, config) for spec in remote_specs]
+        + [parse_forward('dynamic', spec, config) for spec in dynamic_specs]
+    )
+
+def start_background_supervisor(env_alias: str):
+    """Relaunch the current command detached, without --background."""
+    args = [arg for arg in sys.argv[1:] if arg != '--background']
+    # sys.argv[0] is main.py under `python -m src.main`, which cannot import
+    # src when run as a script; always start the package as a module.
+    package_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env = {**os.environ, 'PYTHONPATH': os.pathsep.join(filter(None, [package_root, os.environ.get('PYTHONPATH')]))}
+    os.makedirs(TUNNEL_LOG_DIR, exist_ok=True)
+    out_path = os.path.join(TUNNEL_LOG_DIR, f"supervisor-{env_alias}.out")
+    with open(out_path, 'ab') as out:
+        start = out.tell()
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'src.main'] + args,
+            stdin=subprocess.DEVNULL,
+            stdout=out,
+            stderr=out,
+            env=env,
+            start_new_session=True,
+        )
+
+    # Only report success once the supervisor has registered itself.
+    deadline = time.monotonic() + SUPERVISOR_START_TIMEOUT
+    while not any(t['pid'] == process.pid for t in active_tunnels()):
+        if process.poll() is not None or time.monotonic() > deadline:
+            if process.poll() is None:
+                os.killpg(process.pid, signal.SIGTERM)
+            with open(out_path, 'rb') as f:
+                f.seek(start)
+                output = f.read().decode('utf-8', 'replace').strip()
+            click.echo("Error: Supervisor failed to start." + (f"\n{output}" if output else ''))
+            return
+        time.sleep(0.1)
+    click.echo(f"Supervisor started in the background with PID {process.pid}.")
+    click.echo(f"Stop it with: ussh tunnel manage kill --pid {process.pid}")
+
+def run_supervisor(config: Config, env_config: dict, forwards: list, check_interval: int, background: bool, **fields):
+    """Supervise a tunnel in the foreground, or relaunch this command detached."""
+    try:
+        ssh_cmd = build_ssh_command(env_config, config, forwards, multiplex=False)
+    except ValueError as e:
+        click.echo(f"Error: {e}")
+        return
+    if background:
+        start_background_supervisor(env_config['alias'])
+        return
+
+    supervisor = TunnelSupervisor(ssh_cmd, env_config['alias'], forwards, check_interval=check_interval, **fields)
+    asyncio.run(supervisor.run())
+
+def _format_started(started) -> str:
+    if not started:
+        return 'N/A'
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(started))
 
 @click.command()
-def manage():
-    """List current tunnels and allow killing them."""
-    import re
-    
+@click.option('--env', '-e', required=True, help='Environment alias to use for the tunnel.')
+@click.option('--local', '-L', 'local_specs', multiple=True, help='Local forward LOCAL_PORT:HOST:REMOTE_PORT (repeatable).')
+@click.option('--remote', '-R', 'remote_specs', multiple=True, help='Remote forward REMOTE_PORT:LOCAL_HOST:LOCAL_PORT (repeatable).')
+@click.option('--dynamic', '-D', 'dynamic_specs', multiple=True, help='SOCKS forward on LOCAL_PORT (repeatable).')
+@click.option('--check-interval', type=click.IntRange(min=1), default=10, show_default=True, help='Seconds between health checks.')
+@click.option('--background', is_flag=True, help='Detach and keep supervising after this command returns.')
+def supervise(env, local_specs, remote_specs, dynamic_specs, check_interval, background):
+    """Keep a tunnel up, reconnecting with backoff when it drops.
+
+    Forwarded local ports are health-checked every --check-interval
+    seconds and ssh keepalives detect dead links. Restarts and downtime
+    are shown by 'tunnel manage'.
+    """
     config = load_config()
-    
-    try:
-        ps_output = subprocess.check_output(['ps', 'aux']).decode('utf-8')
-    except subprocess.CalledProcessError as e:
-        click.echo(f"Error getting process list: {e}")
+    env_config = config.lookup('environments', env)
+    if not env_config:
+        click.echo(f"Error: Environment '{env}' not found.")
         return
 
-    tunnel_lines = [line for line in ps_output.splitlines() if 'ssh' in line.lower() and ('-L' in line or '-R' in line) and '-N' in line]
+    forwards = parse_forwards(config, local_specs, remote_specs, dynamic_specs)
+    if not forwards:
+        click.echo("Error: Provide at least one --local, --remote or --dynamic forward.")
+        return
+    run_supervisor(config, env_config, forwards, check_interval, background)
 
-    if not tunnel_lines:
-        click.echo("No active SSH tunnels found.")
+@click.command()
+@click.option('--env', '-e', required=True, help='Environment alias to use for the tunnel.')
+@click.option('--port', '-p', type=int, help=f'Local SOCKS port. Defaults to the environment\'s saved port, else {DEFAULT_SOCKS_PORT}.')
+@click.option('--bind', '-b', help='Local address to listen on (default: loopback).')
+@click.option('--save', is_flag=True, help='Save --port as the default SOCKS port of the environment.')
+@click.option('--supervise', is_flag=True, help='Keep the tunnel up, reconnecting when it drops.')
+@click.option('--background', is_flag=True, help='With --supervise, detach the supervisor.')
+def socks(env, port, bind, save, supervise, background):
+    """Create a dynamic (SOCKS5) forwarding tunnel.
+
+    Point clients at the local port to reach any host the environment
+    can reach, e.g. curl --socks5-hostname 127.0.0.1:1080 http://internal/
+    """
+    config = load_config()
+    env_config = config.lookup('environments', env)
+    if not env_config:
+        click.echo(f"Error: Environment '{env}' not found.")
         return
 
-    tunnels = []
-    for line in tunnel_lines:
-        parts = re.split(r'\s+', line)
-        pid = parts[1]
-        cmd_parts = ' '.join(parts[10:])
-        
-        tunnel_type = "Local" if "-L" in cmd_parts else "Remote" if "-R" in cmd_parts else "Unknown"
-        
-        forwarding_match = re.search(r'-[LR]\s+(\S+)', cmd_parts)
-        forwarding = forwarding_match.group(1) if forwarding_match else "N/A"
-        
-        local_port = "N/A"
-        remote_port = "N/A" 
-        host_address = "N/A"
-        host_alias = "N/A"
-        
-        if forwarding != "N/A":
-            if tunnel_type == "Local":
-                parts = forwarding.split(':')
-                if len(parts) == 3:
-                    local_port = parts[0]
-                    host_address = parts[1]
-                    remote_port = parts[2]
-            elif tunnel_type == "Remote":
-                parts = forwarding.split(':')
-                if len(parts) == 3:
-                    remote_port = parts[0]
-                    host_address = parts[1]
-                    local_port = parts[2]
-        
-        for h in config.get('hosts', []):
-            if h['address'] == host_address:
-                host_alias = h['alias']
-                break
-        
-        host_match = re.search(r'(\S+)$', cmd_parts)
-        target = host_match.group(1) if host_match else "N/A"
-        
-        target_alias = "N/A"
-        for h in config.get('hosts', []):
-            if h['address'] == target:
-                target_alias = h['alias']
-                break
-        
-        tunnels.append([
-            len(tunnels) + 1,
-            pid,
-            tunnel_type,
-            local_port,
-            remote_port,
-            host_alias if host_alias != "N/A" else host_address,
-            target_alias if target_alias != "N/A" else target
-        ])
-    
-    headers = ["Number", "PID", "Type", "Local Port", "Remote Port", "Host (alias)", "Target (alias)"]
-    
+    if save:
+        if port is None:
+            click.echo("Error: --save requires --port.")
+            return
+        config.update('environments', env, socks_port=port)
+        save_config(config)
+        click.echo(f"Default SOCKS port for '{env}' set to {port}.")
+    if port is None:
+        port = env_config.get('socks_port') or DEFAULT_SOCKS_PORT
+
+    forward = {'type': 'dynamic', 'local_port': port}
+    if bind:
+        forward['bind'] = bind
+    if supervise:
+        run_supervisor(config, env_config, [forward], 10, background)
+    elif open_tunnel(config, env_config, [forward]):
+        click.echo(f"SOCKS proxy listening on {bind or '127.0.0.1'}:{port} through '{env}'.")
+
+def _format_status(record: dict) -> str:
+    if not record.get('registered', True):
+        status = 'unregistered'
+    elif not record.get('supervised'):
+        status = 'running'
+    else:
+        status = (f"supervised: {record['state']}\n"
+                  f"{record['restarts']} restart(s), {record['downtime']}s down")
+    if record.get('io'):
+        status += f"\nI/O: {format_bytes(record['io']['read_bytes'])} in, {format_bytes(record['io']['written_bytes'])} out"
+    return status
+
+def collect_tunnels(discover: bool) -> list:
+    """Return registered tunnels, plus unregistered ssh forwards if `discover`."""
+    tunnels = active_tunnels()
+    for t in tunnels:
+        t['io'] = tunnel_io(t)
+    if discover:
+        config = load_config()
+        address_aliases = {}
+        for h in config.entries('hosts'):
+            for address in host_addresses(h):
+                address_aliases.setdefault(address, h['alias'])
+        registered = {t['pid'] for t in tunnels}
+        tunnels += [t for t in discover_tunnels(address_aliases) if t['pid'] not in registered]
+    return tunnels
+
+def select_tunnels(tunnels: list, env=None, port=None, pid=None) -> list:
+    return [
+        t for t in tunnels
+        if (env is None or t.get('env') == env)
+        and (port is None or any(port in forward_ports(f) for f in t['forwards']))
+        and (pid is None or t['pid'] == pid)
+    ]
+
+def print_tunnels(tunnels: list):
+    rows = [
+        [
+            number,
+            t['pid'],
+            (t.get('env') or f"({t.get('target', 'unregistered')})") + (f"\nprofile: {t['profile']}" if t.get('profile') else ''),
+            '\n'.join(describe_forward(f) for f in t['forwards']),
+            _format_started(t.get('started')),
+            _format_status(t),
+        ]
+        for number, t in enumerate(tunnels, 1)
+    ]
+    headers = ["Number", "PID", "Environment", "Forwards", "Started", "Status"]
     click.echo("\nActive SSH Tunnels:")
-    click.echo(tabulate(tunnels, headers=headers, tablefmt="grid"))
+    click.echo(tabulate(rows, headers=headers, tablefmt="grid"))
     click.echo(f"\nTotal active tunnels: {len(tunnels)}\n")
 
+# Columns of `--format tsv`, which flattens the forwards and I/O counters.
+TUNNEL_FIELDS = ['pid', 'env', 'target', 'profile', 'forwards', 'started', 'state', 'restarts', 'downtime', 'read_bytes', 'written_bytes']
+
+def _flat_tunnel(t: dict) -> dict:
+    io = t.get('io') or {}
+    return {
+        **t,
+        'forwards': ', '.join(describe_forward(f) for f in t['forwards']),
+        'state': t.get('state') or ('running' if t.get('registered', True) else 'unregistered'),
+        'read_bytes': io.get('read_bytes'),
+        'written_bytes': io.get('written_bytes'),
+    }
+
+def write_tunnels(tunnels: list, output_format: str):
+    """Print tunnels as JSON Lines, TSV or JSON for scripts."""
+    if output_format == 'tsv':
+        tunnels = (_flat_tunnel(t) for t in tunnels)
+    echo_lines(record_lines(tunnels, output_format, TUNNEL_FIELDS), pager=False)
+
+def kill_tunnels(tunnels: list):
+    for t in tunnels:
+        if stop_tunnel(t):
+            click.echo(f"✓ Killed tunnel with PID {t['pid']}")
+        else:
+            click.echo(f"✗ Tunnel with PID {t['pid']} was not running")
+    unregister_tunnels({t['pid'] for t in tunnels if t.get('registered', True)})
+
+@click.group(invoke_without_command=True)
+@click.option('--discover', is_flag=True, help='Also look for ssh forwards that ussh did not start.')
+@format_option
+@click.pass_context
+def manage(ctx, discover, output_format):
+    """List current tunnels and allow killing them.
+
+    With a --format other than table, print the tunnels without prompting.
+    """
+    ctx.ensure_object(dict)
+    ctx.obj['discover'] = discover
+    if ctx.invoked_subcommand == 'kill' and output_format != 'table':
+        raise click.UsageError("--format only applies when listing tunnels.", ctx)
+    if ctx.invoked_subcommand is not None:
+        return
+
+    tunnels = collect_tunnels(discover)
+    if output_format != 'table':
+        write_tunnels(tunnels, output_format)
+        return
+    if not tunnels:
+        click.echo("No active SSH tunnels found.")
+        return
+
+    print_tunnels(tunnels)
+
     selection = click.prompt("Enter the number(s) of the tunnel(s) to kill (comma-separated, or 'all' or 'none')", default='none')
     if selection.lower() == 'none':
         click.echo("No tunnels killed.")
         return
     elif selection.lower() == 'all':
-        to_kill = [tunnel[1] for tunnel in tunnels] 
+        to_kill = tunnels
     else:
         try:
             indices = [int(i.strip()) for i in selection.split(',')]
-            to_kill = [tunnels[idx-1][1] for idx in indices if 1 <= idx <= len(tunnels)] 
+            to_kill = [tunnels[idx-1] for idx in indices if 1 <= idx <= len(tunnels)]
         except (ValueError, IndexError):
             click.echo("Invalid selection.")
             return
 
-    for pid in to_kill:
-        try:
-            subprocess.run(['kill', pid], check=True)
-            click.echo(f"✓ Killed tunnel with PID {pid}")
-        except subprocess.CalledProcessError as e:
-            click.echo(f"✗ Error killing PID {pid}: {e}")
+    kill_tunnels(to_kill)
+
+@click.group()
+def profile():
+    """Manage named sets of forwards that run in one ssh process."""
+    pass
+
+@click.command(name='add')
+@click.argument('name', required=True)
+@click.option('--env', '-e', required=True, help='Environment alias the forwards go through.')
+@click.option('--local', '-L', 'local_specs', multiple=True, help='Local forward LOCAL_PORT:HOST:REMOTE_PORT (repeatable).')
+@click.option('--remote', '-R', 'remote_specs', multiple=True, help='Remote forward REMOTE_PORT:LOCAL_HOST:LOCAL_PORT (repeatable).')
+@click.option('--dynamic', '-D', 'dynamic_specs', multiple=True, help='SOCKS forward on LOCAL_PORT (repeatable).')
+@click.option('--replace', is_flag=True, help='Overwrite an existing profile with the same name.')
+def profile_add(name, env, local_specs, remote_specs, dynamic_specs, replace):
+    """Save a tunnel profile."""
+    config = load_config()
+    if not config.contains('environments', env):
+        click.echo(f"Error: Environment '{env}' not found.")
+        return
+    if config.contains('tunnel_profiles', name) and not replace:
+        click.echo(f"Error: Tunnel profile '{name}' already exists. Use --replace to overwrite it.")
+        return
+
+    forwards = parse_forwards(config, local_specs, remote_specs, dynamic_specs)
+    if not forwards:
+        click.echo("Error: Provide at least one --local, --remote or --dynamic forward.")
+        return
+
+    if config.contains('tunnel_profiles', name):
+        config.update('tunnel_profiles', name, env_alias=env, forwards=forwards)
+    else:
+        config.add('tunnel_profiles', {"alias": name, "env_alias": env, "forwards": forwards})
+    save_config(config)
+    click.echo(f"Tunnel profile '{name}' saved with {len(forwards)} forward(s) through '{env}'.")
+
+@click.command(name='list')
+def profile_list():
+    """List saved tunnel profiles and whether they are running."""
+    config = load_config()
+    profiles = config.entries('tunnel_profiles')
+    if not profiles:
+        click.echo("No tunnel profiles.")
+        return
+    running = {t.get('profile'): t['pid'] for t in active_tunnels() if t.get('profile')}
+    rows = [
+        [
+            p['alias'],
+            p['env_alias'],
+            '\n'.join(describe_forward(f) for f in p['forwards']),
+            f"up (PID {running[p['alias']]})" if p['alias'] in running else 'down',
+        ]
+        for p in profiles
+    ]
+    click.echo(tabulate(rows, headers=["Profile", "Environment", "Forwards", "Status"], tablefmt="grid"))
+
+@click.command(name='remove')
+@click.argument('name', required=True)
+def profile_remove(name):
+    """Delete a tunnel profile."""
+    config = load_config()
+    if config.remove('tunnel_profiles', name) is None:
+        click.echo(f"Error: Tunnel profile '{name}' not found.")
+        return
+    save_config(config)
+    click.echo(f"Tunnel profile '{name}' removed.")
+
+profile.add_command(profile_add)
+profile.add_command(profile_list)
+profile.add_command(profile_remove)
+
+@click.command()
+@click.argument('name', required=True)
+@click.option('--supervise', is_flag=True, help='Keep the tunnel up, reconnecting when it drops.')
+@click.option('--background', is_flag=True, help='With --supervise, detach the supervisor.')
+@click.option('--check-interval', type=click.IntRange(min=1), default=10, show_default=True, help='With --supervise, seconds between health checks.')
+def up(name, supervise, background, check_interval):
+    """Start every forward of a tunnel profile in a single ssh process."""
+    config = load_config()
+    profile_entry = config.lookup('tunnel_profiles', name)
+    if profile_entry is None:
+        click.echo(f"Error: Tunnel profile '{name}' not found.")
+        return
+    env_config = config.lookup('environments', profile_entry['env_alias'])
+    if env_config is None:
+        click.echo(f"Error: Environment '{profile_entry['env_alias']}' of profile '{name}' not found.")
+        return
+
+    running = [t for t in active_tunnels() if t.get('profile') == name]
+    if running:
+        click.echo(f"Error: Tunnel profile '{name}' is already up (PID {running[0]['pid']}).")
+        return
+
+    if supervise:
+        run_supervisor(config, env_config, profile_entry['forwards'], check_interval, background, profile=name)
+    elif open_tunnel(config, env_config, profile_entry['forwards'], profile=name):
+        click.echo(f"Tunnel profile '{name}' is up with {len(profile_entry['forwards'])} forward(s).")
+
+@click.command()
+@click.argument('name', required=True)
+def down(name):
+    """Stop the tunnel started for a profile."""
+    running = [t for t in active_tunnels() if t.get('profile') == name]
+    if not running:
+        click.echo(f"Tunnel profile '{name}' is not up.")
+        return
+    kill_tunnels(running)
+
+@click.command(name='list')
+@click.option('--json', 'as_json', is_flag=True, help='Print the tunnels as JSON (same as --format json).')
+@format_option
+@click.pass_context
+def list_tunnels(ctx, as_json, output_format):
+    """List active tunnels without prompting."""
+    tunnels = collect_tunnels(ctx.obj['discover'])
+    output_format = group_defaults(ctx, output_format=output_format)['output_format']
+    if as_json:
+        output_format = 'json'
+    if output_format != 'table':
+        write_tunnels(tunnels, output_format)
+    elif tunnels:
+        print_tunnels(tunnels)
+    else:
+        click.echo("No active SSH tunnels found.")
+
+@click.command()
+@click.option('--env', '-e', help='Kill tunnels of this environment.')
+@click.option('--port', '-p', type=int, help='Kill tunnels forwarding this local or remote port.')
+@click.option('--pid', type=int, help='Kill the tunnel with this PID.')
+@click.option('--all', 'kill_all', is_flag=True, help='Kill every listed tunnel.')
+@click.pass_context
+def kill(ctx, env, port, pid, kill_all):
+    """Kill tunnels by environment, port or PID without prompting."""
+    if env is None and port is None and pid is None and not kill_all:
+        click.echo("Error: Provide --env, --port, --pid or --all option.")
+        ctx.exit(2)
+
+    tunnels = select_tunnels(collect_tunnels(ctx.obj['discover']), env, port, pid)
+    if not tunnels:
+        click.echo("No matching tunnels found.")
+        ctx.exit(1)
+    kill_tunnels(tunnels)
+
+manage.add_command(list_tunnels)
+manage.add_command(kill)
 
 tunnel.add_command(local)
 tunnel.add_command(remote)
-tunnel.add_command(manage)
\ No newline at end of file
+tunnel.add_command(socks)
+tunnel.add_command(supervise)
+tunnel.add_command(profile)
+tunnel.add_command(up)
+tunnel.add_command(down)
+tunnel.add_command(manage)
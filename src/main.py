@@ -1,27 +1,44 @@
+import importlib
 import click
-from src.commands.add import add
-from src.commands.list import list
-from src.commands.remove import remove
-from src.commands.connect import connect
-from src.commands.find import find
-from src.commands.change import change
-from src.commands.update import update
-from src.commands.tunnel import tunnel
 
-@click.group()
+LAZY_COMMANDS = {
+    'add': 'src.commands.add.add',
+    'list': 'src.commands.list.list',
+    'remove': 'src.commands.remove.remove',
+    'rm': 'src.commands.remove.remove',
+    'connect': 'src.commands.connect.connect',
+    'con': 'src.commands.connect.connect',
+    'exec': 'src.commands.exec.exec_',
+    'ping': 'src.commands.ping.ping',
+    'find': 'src.commands.find.find',
+    'change': 'src.commands.change.change',
+    'update': 'src.commands.update.update',
+    'tunnel': 'src.commands.tunnel.tunnel',
+    'storage': 'src.commands.storage.storage',
+    'import': 'src.commands.importer.import_',
+    'export': 'src.commands.export.export',
+    'pool': 'src.commands.pool.pool',
+}
+
+class LazyGroup(click.Group):
+    """Click group that imports a command module only when it is dispatched."""
+
+    def __init__(self, *args, lazy_commands=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_commands = lazy_commands or {}
+
+    def list_commands(self, ctx):
+        return sorted(set(super().list_commands(ctx)) | set(self.lazy_commands))
+
+    def get_command(self, ctx, cmd_name):
+        if cmd_name in self.lazy_commands:
+            module_name, attr = self.lazy_commands[cmd_name].rsplit('.', 1)
+            return getattr(importlib.import_module(module_name), attr)
+        return super().get_command(ctx, cmd_name)
+
+@click.group(cls=LazyGroup, lazy_commands=LAZY_COMMANDS)
 def cli():
     pass
 
-cli.add_command(add)
-cli.add_command(list)
-cli.add_command(remove)
-cli.add_command(remove, name='rm')
-cli.add_command(connect)
-cli.add_command(connect, name='con')
-cli.add_command(find)
-cli.add_command(change)
-cli.add_command(update)
-cli.add_command(tunnel)
-
 if __name__ == "__main__":
-    cli()
\ No newline at end of file
+    cli()
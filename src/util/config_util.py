@@ -1,23 +1,454 @@
 import os
+import copy
 import json
+import zlib
+import fcntl
+import click
+import pickle
+import tempfile
+from contextlib import contextmanager
+from typing import Optional
 
 CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'config', 'info.json')
+SNAPSHOT_PATH = os.path.join(os.path.dirname(CONFIG_PATH), 'info.snapshot')
+JOURNAL_PATH = os.path.join(os.path.dirname(CONFIG_PATH), 'info.journal')
+DB_PATH = os.path.join(os.path.dirname(CONFIG_PATH), 'info.db')
+LOCK_PATH = os.path.join(os.path.dirname(CONFIG_PATH), 'info.lock')
+SSH_CONFIG_PATH = os.path.join(os.path.dirname(CONFIG_PATH), 'ssh_config')
 SECRETS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'secrets')
 
-def load_config():
-    if os.path.exists(CONFIG_PATH):
-        with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return {
-        "hosts": [],
-        "ports": [],
-        "usernames": [],
-        "passwords": [],
-        "keypairs": [],
-        "environments": []
-    }
-
-def save_config(config):
+SNAPSHOT_FORMAT = 5
+
+# Set to 'journal' to append mutations to JOURNAL_PATH instead of rewriting
+# CONFIG_PATH on every save, or to 'json' to compact the journal away again.
+# The SQLite store is used once DB_PATH exists (see `ussh storage migrate`).
+STORAGE_ENV = 'USSH_STORAGE'
+STORAGE_MODES = ['json', 'journal', 'sqlite']
+JOURNAL_COMPACT_RECORDS = 256
+
+CATEGORIES = ['hosts', 'ports', 'usernames', 'passwords', 'keypairs', 'environments', 'tunnel_profiles']
+
+# Fields through which entries refer to other entries, per category:
+# field -> category of the referenced entry.
+REFERENCES = {
+    'environments': {
+        'host_alias': 'hosts',
+        'port_alias': 'ports',
+        'username_alias': 'usernames',
+        'password_alias': 'passwords',
+        'keypair_alias': 'keypairs',
+        'proxy_alias': 'environments',
+    },
+    'tunnel_profiles': {'env_alias': 'environments'},
+}
+
+class ConfigConflictError(click.ClickException):
+    """A change could not be saved because another process changed the same entry."""
+
+class StorageError(click.ClickException):
+    """The selected storage backend has no store to open."""
+
+def value_field(category: str) -> str:
+    """Return the name of the field holding a component's value."""
+    if category == 'hosts':
+        return 'address'
+    if category == 'keypairs':
+        return 'path'
+    if category == 'tunnel_profiles':
+        return 'env_alias'
+    return 'value'
+
+def resolve_port(config: 'Config', port_alias) -> int:
+    """Return the port number an environment's port_alias refers to."""
+    if not port_alias:
+        return 22
+    port = config.lookup('ports', port_alias)
+    if port is not None:
+        return int(port['value'])
+    return int(port_alias) if str(port_alias).isdigit() else 22
+
+def keypair_file_path(path: str) -> str:
+    """Return the file location of a stored keypair path."""
+    if path.startswith('src/secrets/'):
+        return os.path.join(SECRETS_DIR, path.replace('src/secrets/', ''))
+    return path
+
+class Config:
+    """Loaded configuration with an alias -> entry index per category.
+
+    Mutations made through add/remove/update are also recorded in `changes`
+    so they can be appended to the journal instead of rewriting the file.
+    A reverse index of REFERENCES is built on first use of referrers() and
+    kept up to date by the same methods.
+    """
+
+    backend = 'json'
+
+    def __init__(self, data: Optional[dict] = None):
+        self.data = dict(data or {})
+        self.version = self.data.pop('version', 0)
+        for category in CATEGORIES:
+            self.data.setdefault(category, [])
+        self._index = {
+            category: {entry['alias']: entry for entry in self.data[category]}
+            for category in CATEGORIES
+        }
+        self.changes = []
+        self._base_key = None
+        self._disk_stamp = None
+        self._journal_offset = 0
+        self._journal_records = 0
+        self._referrers = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_referrers'] = None
+        return state
+
+    def _link(self, category: str, entry: dict, linked: bool = True):
+        for field, target in REFERENCES.get(category, {}).items():
+            if entry.get(field):
+                refs = self._referrers.setdefault((target, entry[field]), set())
+                if linked:
+                    refs.add((category, entry['alias'], field))
+                else:
+                    refs.discard((category, entry['alias'], field))
+
+    def referrers(self, category: str, alias: str) -> list:
+        """Return (category, alias, field) for each entry that refers to an entry."""
+        if self._referrers is None:
+            self._referrers = {}
+            for referring in REFERENCES:
+                for entry in self.data[referring]:
+                    self._link(referring, entry)
+        return sorted(self._referrers.get((category, alias), ()))
+
+    def entries(self, category: str) -> list:
+        return self.data[category]
+
+    def lookup(self, category: str, alias: str) -> Optional[dict]:
+        return self._index[category].get(alias)
+
+    def contains(self, category: str, alias: str) -> bool:
+        return alias in self._index[category]
+
+    def add(self, category: str, entry: dict):
+        self.data[category].append(entry)
+        self._index[category][entry['alias']] = entry
+        if self._referrers is not None:
+            self._link(category, entry)
+        self.changes.append(['add', category, copy.deepcopy(entry)])
+
+    def remove(self, category: str, alias: str) -> Optional[dict]:
+        entry = self._index[category].pop(alias, None)
+        if entry is not None:
+            self.data[category] = [e for e in self.data[category] if e is not entry]
+            if self._referrers is not None:
+                self._link(category, entry, linked=False)
+            self.changes.append(['remove', category, alias])
+        return entry
+
+    def update(self, category: str, alias: str, /, **fields) -> dict:
+        entry = self._index[category][alias]
+        new_alias = fields.get('alias')
+        if self._referrers is not None:
+            self._link(category, entry, linked=False)
+        entry.update(fields)
+        if self._referrers is not None:
+            self._link(category, entry)
+        if new_alias is not None and new_alias != alias:
+            del self._index[category][alias]
+            self._index[category][new_alias] = entry
+        self.changes.append(['update', category, alias, copy.deepcopy(fields)])
+        return entry
+
+    def rename(self, category: str, alias: str, new_alias: str) -> list:
+        """Rename an entry and point everything that referred to it at the new alias.
+
+        Returns the referrers that were updated.
+        """
+        referrers = self.referrers(category, alias)
+        self.update(category, alias, alias=new_alias)
+        for ref_category, ref_alias, field in referrers:
+            self.update(ref_category, ref_alias, **{field: new_alias})
+        return referrers
+
+    def dependents(self, category: str, alias: str) -> list:
+        """Return (category, alias) of the entries that cannot exist without an entry.
+
+        Includes entries that depend on it indirectly, such as environments
+        using an environment as proxy, in the order they were found.
+        """
+        found = []
+        seen = {(category, alias)}
+        pending = [(category, alias)]
+        while pending:
+            for ref_category, ref_alias, _ in self.referrers(*pending.pop(0)):
+                if (ref_category, ref_alias) not in seen:
+                    seen.add((ref_category, ref_alias))
+                    found.append((ref_category, ref_alias))
+                    pending.append((ref_category, ref_alias))
+        return found
+
+    def apply(self, change: list):
+        """Replay a change recorded by add/remove/update."""
+        op, category = change[0], change[1]
+        if op == 'add':
+            self.add(category, change[2])
+        elif op == 'remove':
+            self.remove(category, change[2])
+        elif op == 'update':
+            self.update(category, change[2], **change[3])
+        else:
+            raise ValueError(f"Unknown config change '{op}'.")
+
+    def to_dict(self) -> dict:
+        return {'version': self.version, **self.data}
+
+def storage_mode() -> str:
+    mode = os.environ.get(STORAGE_ENV)
+    if mode in STORAGE_MODES:
+        return mode
+    if os.path.exists(DB_PATH):
+        return 'sqlite'
+    return 'journal' if os.path.exists(JOURNAL_PATH) else 'json'
+
+@contextmanager
+def config_lock():
+    """Hold an exclusive advisory lock on the config store."""
+    os.makedirs(os.path.dirname(LOCK_PATH), exist_ok=True)
+    fd = os.open(LOCK_PATH, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
+
+def check_change(config: Config, change: list):
+    """Raise ConfigConflictError if `change` no longer applies to `config`."""
+    op, category = change[0], change[1]
+    alias = change[2]['alias'] if op == 'add' else change[2]
+    if op == 'add' and config.contains(category, alias):
+        raise ConfigConflictError(f"'{alias}' was added to {category} by another process. Nothing was saved.")
+    if op != 'add' and not config.contains(category, alias):
+        raise ConfigConflictError(f"'{alias}' was removed from {category} by another process. Nothing was saved.")
+    if op == 'update':
+        new_alias = change[3].get('alias')
+        if new_alias not in (None, alias) and config.contains(category, new_alias):
+            raise ConfigConflictError(f"'{new_alias}' was added to {category} by another process. Nothing was saved.")
+
+def _disk_stamp(paths: Optional[tuple] = None) -> tuple:
+    stamps = []
+    for path in paths or (CONFIG_PATH, JOURNAL_PATH):
+        try:
+            stat = os.stat(path)
+            stamps.append((stat.st_ino, stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            stamps.append(None)
+    return tuple(stamps)
+
+def store_stamp(storage: Optional[str] = None) -> tuple:
+    """Fingerprint the config store from file metadata, without reading it.
+
+    Changes whenever a save is made, so caches derived from the config can
+    be checked without loading it.
+    """
+    if (storage or storage_mode()) == 'sqlite':
+        return ('sqlite',) + _disk_stamp((DB_PATH,))
+    return ('json',) + _disk_stamp()
+
+def atomic_write(path: str, raw: bytes, sync: bool = True) -> os.stat_result:
+    """Write `raw` to a temp file next to `path` and rename it into place."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=f".{os.path.basename(path)}.")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            if os.path.exists(path):
+                os.chmod(tmp_path, os.stat(path).st_mode & 0o777)
+            f.write(raw)
+            f.flush()
+            if sync:
+                os.fsync(f.fileno())
+            stat = os.fstat(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return stat
+
+def _snapshot_key(stat: os.stat_result) -> tuple:
+    # Saves replace the file, so the inode changes with every write; ctime
+    # also catches in-place edits that keep the size and reset the mtime.
+    return (SNAPSHOT_FORMAT, stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns, stat.st_ctime_ns)
+
+def _read_snapshot(key: tuple) -> Optional[Config]:
+    """Return the cached Config if the snapshot was built from the same file."""
+    try:
+        with open(SNAPSHOT_PATH, 'rb') as f:
+            if pickle.load(f) != key:
+                return None
+            config = pickle.load(f)
+    except Exception:
+        return None
+    return config if isinstance(config, Config) else None
+
+def _write_snapshot(config: Config, key: tuple):
+    raw = pickle.dumps(key, protocol=pickle.HIGHEST_PROTOCOL) + pickle.dumps(config, protocol=pickle.HIGHEST_PROTOCOL)
+    try:
+        atomic_write(SNAPSHOT_PATH, raw, sync=False)
+    except OSError:
+        # The snapshot is only a cache; loading falls back to parsing JSON.
+        pass
+
+def _parse_journal_line(line: bytes) -> Optional[dict]:
+    crc, _, payload = line.rstrip(b'\n').partition(b' ')
+    try:
+        if int(crc, 16) != zlib.crc32(payload):
+            return None
+        return json.loads(payload)
+    except ValueError:
+        return None
+
+def _replay_journal(config: Config) -> int:
+    """Apply journal records newer than the config's version, in order."""
+    try:
+        with open(JOURNAL_PATH, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            offset = config._journal_offset if config._journal_offset <= size else 0
+            f.seek(offset)
+            data = f.read()
+    except FileNotFoundError:
+        return 0
+    
+    applied = 0
+    for line in data.splitlines(keepends=True):
+        if not line.endswith(b'\n'):
+            # Torn tail from an interrupted append.
+            break
+        offset += len(line)
+        record = _parse_journal_line(line)
+        if record is None or record.get('version') != config.version + 1:
+            continue
+        for change in record['changes']:
+            config.apply(change)
+        config.version = record['version']
+        applied += 1
+    
+    config.changes = []
+    config._journal_offset = offset
+    config._journal_records += applied
+    return applied
+
+def _append_journal(config: Config):
+    version = config.version + 1
+    payload = json.dumps({'version': version, 'changes': config.changes}, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    line = f"{zlib.crc32(payload):08x} ".encode('ascii') + payload + b'\n'
+    
+    fd = os.open(JOURNAL_PATH, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o600)
+    try:
+        size = os.fstat(fd).st_size
+        if size and os.pread(fd, 1, size - 1) != b'\n':
+            # Keep a torn record on its own line so it is skipped on replay.
+            line = b'\n' + line
+        os.write(fd, line)
+        os.fsync(fd)
+        offset = os.fstat(fd).st_size
+    finally:
+        os.close(fd)
+    
+    config.version = version
+    config.changes = []
+    config._journal_offset = offset
+    config._journal_records += 1
+
+def _write_base(config: Config, mode: str):
+    config.version += 1
+    raw = json.dumps(config.to_dict(), indent=4, ensure_ascii=False).encode('utf-8')
+    atomic_write(CONFIG_PATH, raw)
+    
+    # Records up to config.version are now part of the base file, so a crash
+    # before the journal is reset only leaves records that replay skips.
+    if mode == 'journal':
+        atomic_write(JOURNAL_PATH, b'')
+    elif os.path.exists(JOURNAL_PATH):
+        os.remove(JOURNAL_PATH)
+    
+    config.changes = []
+    config._base_key = _snapshot_key(os.stat(CONFIG_PATH))
+    config._journal_offset = 0
+    config._journal_records = 0
+
+def load_config(storage: Optional[str] = None) -> Config:
+    if (storage or storage_mode()) == 'sqlite':
+        from src.util.sqlite_store import load_sqlite_config
+        return load_sqlite_config()
+    
+    # Stamp before reading so a concurrent write is seen as a change on save.
+    stamp = _disk_stamp()
+    if not os.path.exists(CONFIG_PATH):
+        config = Config()
+        _replay_journal(config)
+        config._disk_stamp = stamp
+        return config
+    
+    with open(CONFIG_PATH, 'rb') as f:
+        key = _snapshot_key(os.fstat(f.fileno()))
+        config = _read_snapshot(key)
+        fresh = config is None
+        if fresh:
+            config = Config(json.loads(f.read()))
+            config._base_key = key
+    
+    # The snapshot is of the base file only; journal records after its
+    # offset are replayed on every load until the next compaction.
+    _replay_journal(config)
+    if fresh:
+        _write_snapshot(config, key)
+    config._disk_stamp = stamp
+    return config
+
+def _after_save(config: Config, changes: list, store_before: Optional[tuple]):
+    """Refresh files derived from the config after a save.
+
+    `store_before` is the store's file stamp just before the save.
+    """
+    if os.path.exists(SSH_CONFIG_PATH):
+        from src.util.ssh_config_util import refresh_ssh_config
+        refresh_ssh_config(config, changes)
+    from src.util.search_util import update_search_index
+    update_search_index(config, changes, store_before)
+
+def save_config(config: Config, storage: Optional[str] = None):
+    """Save the changes made to `config`.
+
+    If another process saved since `config` was loaded, its recorded changes
+    are replayed on top of the current store instead of overwriting it.
+    """
+    if config.backend == 'sqlite':
+        changes = config.changes
+        store_before = store_stamp('sqlite')
+        config.commit()
+        _after_save(config, changes, store_before)
+        return
+    
     os.makedirs(os.path.dirname(CONFIG_PATH), exist_ok=True)
-    with open(CONFIG_PATH, 'w', encoding='utf-8') as f:
-        json.dump(config, f, indent=4, ensure_ascii=False)
\ No newline at end of file
+    mode = storage or storage_mode()
+    with config_lock():
+        if config._disk_stamp is not None and config._disk_stamp != _disk_stamp():
+            current = load_config('json')
+            for change in config.changes:
+                check_change(current, change)
+                current.apply(change)
+            config.__dict__.update(current.__dict__)
+        
+        changes = config.changes
+        # The stamp checked (or rebased to) above: the store before this save.
+        store_before = config._disk_stamp
+        if mode == 'journal' and config._base_key and config._journal_records < JOURNAL_COMPACT_RECORDS:
+            # The snapshot still matches the base file; loads replay this record.
+            _append_journal(config)
+        else:
+            _write_base(config, mode)
+            _write_snapshot(config, config._base_key)
+        config._disk_stamp = _disk_stamp()
+    _after_save(config, changes, store_before)
@@ -0,0 +1,45 @@
+import json
+import os
+import time
+from typing import Optional
+from src.util.config_util import CONFIG_PATH, atomic_write
+
+# Holds resolved commands, sshpass passwords included, so it is kept 0600
+# like the rest of the config directory's secrets.
+CONNECTION_CACHE_PATH = os.path.join(os.path.dirname(CONFIG_PATH), 'connect_cache.json')
+
+def _cache_key(alias: str, multiplex: bool) -> str:
+    return f"{alias}\n{'mux' if multiplex else 'direct'}"
+
+def _load_cache() -> dict:
+    try:
+        with open(CONNECTION_CACHE_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def cached_connection(alias: str, multiplex: bool, stamp: tuple) -> Optional[dict]:
+    """Return the cached connection for `alias` if the config has not changed.
+
+    `stamp` is the store_stamp() taken before the config would be loaded.
+    """
+    cache = _load_cache()
+    if cache.get('stamp') != json.loads(json.dumps(stamp)):
+        return None
+    entry = cache.get('connections', {}).get(_cache_key(alias, multiplex))
+    if entry is None or (entry.get('expires') and entry['expires'] < time.time()):
+        return None
+    return entry
+
+def cache_connection(alias: str, multiplex: bool, stamp: tuple, connection: dict, expires: Optional[float] = None):
+    """Store a resolved connection, dropping entries from older configs."""
+    cache = _load_cache()
+    if cache.get('stamp') != json.loads(json.dumps(stamp)):
+        cache = {'stamp': stamp, 'connections': {}}
+    cache['connections'][_cache_key(alias, multiplex)] = {**connection, 'expires': expires}
+    try:
+        atomic_write(CONNECTION_CACHE_PATH, json.dumps(cache, ensure_ascii=False).encode('utf-8'), sync=False)
+        os.chmod(CONNECTION_CACHE_PATH, 0o600)
+    except OSError:
+        # Only a cache; the next connect resolves the environment again.
+        pass
@@ -0,0 +1,367 @@
+import os
+import re
+import glob
+import json
+import shlex
+import fnmatch
+import hashlib
+from typing import Optional
+from src.util.config_util import CONFIG_PATH, REFERENCES, Config, atomic_write
+
+IMPORT_STATE_PATH = os.path.join(os.path.dirname(CONFIG_PATH), 'import_state.json')
+
+# Categories in the order entries are added, so references resolve.
+IMPORT_CATEGORIES = ['hosts', 'ports', 'usernames', 'keypairs', 'environments']
+
+class ImportSource:
+    """Host records read from an inventory, plus the digest of the files read."""
+
+    def __init__(self):
+        self.records = {}
+        self.warnings = []
+        self._hash = hashlib.sha1()
+
+    def read(self, path: str) -> str:
+        with open(path, 'rb') as f:
+            raw = f.read()
+        self._hash.update(path.encode('utf-8') + b'\0' + raw)
+        return raw.decode('utf-8')
+
+    @property
+    def digest(self) -> str:
+        return self._hash.hexdigest()
+
+def _record(name, hostname=None, port=None, user=None, identity_file=None, proxy_jump=None) -> dict:
+    return {
+        'name': name,
+        'hostname': hostname or name,
+        'port': int(port) if port else 22,
+        'user': user,
+        'identity_file': os.path.expanduser(identity_file) if identity_file else None,
+        'proxy_jump': proxy_jump,
+    }
+
+def _ssh_config_blocks(source: ImportSource, path: str, blocks: list, depth: int = 0):
+    """Collect (patterns, options) blocks from an ssh_config file and its Includes."""
+    if depth > 16:
+        return
+    patterns = ['*']
+    options = {}
+    blocks.append((patterns, options))
+    for line in source.read(path).splitlines():
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        parts = re.split(r'\s*=\s*|\s+', line, maxsplit=1)
+        key = parts[0].lower()
+        value = parts[1].strip() if len(parts) > 1 else ''
+        if key == 'host':
+            patterns = value.split()
+            options = {}
+            blocks.append((patterns, options))
+        elif key == 'match':
+            # Match criteria cannot be evaluated here; skip the block.
+            patterns = []
+            options = {}
+            blocks.append((patterns, options))
+        elif key == 'include':
+            for pattern in shlex.split(value):
+                pattern = os.path.expanduser(pattern)
+                if not os.path.isabs(pattern):
+                    pattern = os.path.join(os.path.expanduser('~/.ssh'), pattern)
+                for included in sorted(glob.glob(pattern)):
+                    _ssh_config_blocks(source, included, blocks, depth + 1)
+            # Options after an Include still belong to the enclosing block.
+            options = {}
+            blocks.append((patterns, options))
+        else:
+            options.setdefault(key, value)
+
+def _host_matches(name: str, patterns: list) -> bool:
+    matched = False
+    for pattern in patterns:
+        if pattern.startswith('!'):
+            if fnmatch.fnmatchcase(name, pattern[1:]):
+                return False
+        elif fnmatch.fnmatchcase(name, pattern):
+            matched = True
+    return matched
+
+def read_ssh_config(path: str) -> ImportSource:
+    """Read Host blocks from an OpenSSH client config, first value wins."""
+    source = ImportSource()
+    blocks = []
+    _ssh_config_blocks(source, path, blocks)
+
+    names = []
+    for patterns, _ in blocks:
+        for pattern in patterns:
+            if not any(c in pattern for c in '*?!') and pattern not in names:
+                names.append(pattern)
+
+    for name in names:
+        options = {}
+        for patterns, block_options in blocks:
+            if _host_matches(name, patterns):
+                for key, value in block_options.items():
+                    options.setdefault(key, value)
+        source.records[name] = _record(
+            name,
+            hostname=options.get('hostname'),
+            port=options.get('port'),
+            user=options.get('user'),
+            identity_file=options.get('identityfile'),
+            proxy_jump=options.get('proxyjump'),
+        )
+    return source
+
+def _expand_host_pattern(name: str) -> list:
+    match = re.search(r'\[(\d+):(\d+)\]', name)
+    if not match:
+        return [name]
+    start, end = match.group(1), match.group(2)
+    width = len(start) if start.startswith('0') else 0
+    return [
+        expanded
+        for i in range(int(start), int(end) + 1)
+        for expanded in _expand_host_pattern(name[:match.start()] + str(i).zfill(width) + name[match.end():])
+    ]
+
+def _ansible_proxy_jump(host_vars: dict) -> Optional[str]:
+    for key in ('ansible_ssh_common_args', 'ansible_ssh_extra_args'):
+        match = re.search(r'(?:ProxyJump=|-J\s*)(\S+)', str(host_vars.get(key, '')))
+        if match:
+            return match.group(1).strip('\'"')
+    return None
+
+def _ansible_record(name: str, host_vars: dict) -> dict:
+    return _record(
+        name,
+        hostname=host_vars.get('ansible_host') or host_vars.get('ansible_ssh_host'),
+        port=host_vars.get('ansible_port') or host_vars.get('ansible_ssh_port'),
+        user=host_vars.get('ansible_user') or host_vars.get('ansible_ssh_user'),
+        identity_file=host_vars.get('ansible_ssh_private_key_file') or host_vars.get('ansible_private_key_file'),
+        proxy_jump=_ansible_proxy_jump(host_vars),
+    )
+
+def _read_ansible_ini(source: ImportSource, path: str):
+    group_hosts = {}
+    group_vars = {}
+    parents = {}
+    group, kind = 'ungrouped', 'hosts'
+
+    for line in source.read(path).splitlines():
+        line = line.strip()
+        if not line or line[0] in '#;':
+            continue
+        if line.startswith('[') and line.endswith(']'):
+            group, _, kind = line[1:-1].partition(':')
+            kind = kind or 'hosts'
+            continue
+        if kind == 'vars':
+            key, _, value = line.partition('=')
+            group_vars.setdefault(group, {})[key.strip()] = value.strip().strip('\'"')
+        elif kind == 'children':
+            parents.setdefault(line.split()[0], []).append(group)
+        elif kind == 'hosts':
+            tokens = shlex.split(line, comments=True)
+            host_vars = dict(token.split('=', 1) for token in tokens[1:] if '=' in token)
+            for name in _expand_host_pattern(tokens[0]):
+                group_hosts.setdefault(name, []).append((group, host_vars))
+
+    def inherited_vars(group, seen=()):
+        merged = dict(group_vars.get('all', {}))
+        for parent in parents.get(group, []):
+            if parent not in seen:
+                merged.update(inherited_vars(parent, seen + (group,)))
+        merged.update(group_vars.get(group, {}))
+        return merged
+
+    for name, memberships in group_hosts.items():
+        host_vars = {}
+        for group, _ in memberships:
+            host_vars.update(inherited_vars(group))
+        for _, own_vars in memberships:
+            host_vars.update(own_vars)
+        source.records[name] = _ansible_record(name, host_vars)
+
+def _read_ansible_yaml(source: ImportSource, path: str):
+    try:
+        import yaml
+    except ImportError:
+        raise ValueError("PyYAML is required for YAML inventories. Install it with: pip install pyyaml")
+
+    hosts = {}
+
+    def walk(node, inherited):
+        node = node or {}
+        group_vars = {**inherited, **(node.get('vars') or {})}
+        for pattern, own_vars in (node.get('hosts') or {}).items():
+            for name in _expand_host_pattern(str(pattern)):
+                hosts.setdefault(name, {}).update({**group_vars, **(own_vars or {})})
+        for child in (node.get('children') or {}).values():
+            walk(child, group_vars)
+
+    data = yaml.safe_load(source.read(path)) or {}
+    if not isinstance(data, dict):
+        raise ValueError(f"'{path}' is not a YAML inventory.")
+    for node in data.values():
+        walk(node, {})
+    for name, host_vars in hosts.items():
+        source.records[name] = _ansible_record(name, host_vars)
+
+def read_ansible_inventory(path: str) -> ImportSource:
+    """Read hosts from an Ansible INI or YAML inventory file."""
+    source = ImportSource()
+    if os.path.splitext(path)[1].lower() in ('.yml', '.yaml'):
+        _read_ansible_yaml(source, path)
+    else:
+        _read_ansible_ini(source, path)
+    return source
+
+def build_import_entries(source: ImportSource) -> dict:
+    """Map host records to ussh entries keyed by (category, alias)."""
+    entries = {}
+    keypair_aliases = {}
+
+    for record in source.records.values():
+        name = record['name']
+        entries[('hosts', name)] = {"address": record['hostname'], "alias": name}
+
+        port_alias = str(record['port'])
+        if record['port'] != 22:
+            entries[('ports', port_alias)] = {"value": record['port'], "alias": port_alias}
+
+        if record['user']:
+            entries[('usernames', record['user'])] = {"value": record['user'], "alias": record['user']}
+
+        keypair_alias = None
+        if record['identity_file']:
+            path = record['identity_file']
+            if path not in keypair_aliases:
+                base = os.path.basename(path)
+                keypair_alias = base
+                suffix = 2
+                while keypair_alias in keypair_aliases.values():
+                    keypair_alias = f"{base}-{suffix}"
+                    suffix += 1
+                keypair_aliases[path] = keypair_alias
+            keypair_alias = keypair_aliases[path]
+            entries[('keypairs', keypair_alias)] = {"path": path, "alias": keypair_alias}
+
+        proxy_alias = None
+        if record['proxy_jump'] and record['proxy_jump'].lower() != 'none':
+            # ussh environments take a single proxy; the last hop is the one
+            # that connects to this host.
+            hop = record['proxy_jump'].split(',')[-1]
+            hop = hop.rsplit('@', 1)[-1].split(':', 1)[0]
+            if hop in source.records and hop != name:
+                proxy_alias = hop
+            else:
+                source.warnings.append(f"ProxyJump '{record['proxy_jump']}' of '{name}' is not an imported host; ignored.")
+
+        entries[('environments', name)] = {
+            "alias": name,
+            "host_alias": name,
+            "port_alias": port_alias,
+            "username_alias": record['user'],
+            "password_alias": None,
+            "keypair_alias": keypair_alias,
+            "proxy_alias": proxy_alias
+        }
+
+    return dict(sorted(entries.items(), key=lambda item: IMPORT_CATEGORIES.index(item[0][0])))
+
+def entry_digest(entry: dict) -> str:
+    return hashlib.sha1(json.dumps(entry, sort_keys=True).encode('utf-8')).hexdigest()
+
+def load_import_state() -> dict:
+    try:
+        with open(IMPORT_STATE_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def save_import_state(state: dict):
+    atomic_write(IMPORT_STATE_PATH, json.dumps(state, indent=4, ensure_ascii=False).encode('utf-8'))
+
+def apply_import(config: Config, entries: dict, previous: dict) -> tuple:
+    """Apply the difference between `entries` and the previous import to `config`.
+
+    `previous` maps category -> alias -> digest for the entries this source
+    created last time. Returns (summary counts, new digests, warnings).
+    """
+    summary = {'added': 0, 'changed': 0, 'removed': 0, 'unchanged': 0}
+    digests = {}
+    warnings = []
+
+    skipped = set()
+    for (category, alias), entry in entries.items():
+        existing = config.lookup(category, alias)
+        if alias not in previous.get(category, {}) and existing is not None and existing != entry:
+            skipped.add((category, alias))
+            warnings.append(f"{category[:-1].capitalize()} '{alias}' already exists and is not managed by this import; skipped.")
+
+    # An entry referring to a skipped alias would be bound to the existing
+    # entry of that name instead, so it is skipped too, and so on.
+    blocked = True
+    while blocked:
+        blocked = False
+        for (category, alias), entry in entries.items():
+            if (category, alias) in skipped:
+                continue
+            for field, target in REFERENCES.get(category, {}).items():
+                if (target, entry.get(field)) in skipped:
+                    skipped.add((category, alias))
+                    warnings.append(f"{category[:-1].capitalize()} '{alias}' uses {target[:-1]} '{entry[field]}', which was skipped; skipped.")
+                    blocked = True
+                    break
+
+    for (category, alias), entry in entries.items():
+        digest = entry_digest(entry)
+        previous_digest = previous.get(category, {}).get(alias)
+        existing = config.lookup(category, alias)
+
+        if (category, alias) in skipped:
+            if previous_digest is not None:
+                # Left as it is, but still managed by this import.
+                digests.setdefault(category, {})[alias] = previous_digest
+            continue
+        if previous_digest is None and existing is not None:
+            # Identical to an entry made by hand, which stays unmanaged so a
+            # resync never removes it.
+            summary['unchanged'] += 1
+            continue
+
+        digests.setdefault(category, {})[alias] = digest
+        if existing is None:
+            config.add(category, entry)
+            summary['added'] += 1
+        elif previous_digest != digest and existing != entry:
+            config.update(category, alias, **entry)
+            summary['changed'] += 1
+        else:
+            summary['unchanged'] += 1
+
+    dropped = {
+        (category, alias)
+        for category in IMPORT_CATEGORIES
+        for alias in previous.get(category, {})
+        if alias not in digests.get(category, {})
+    }
+    for category in reversed(IMPORT_CATEGORIES):
+        for alias in previous.get(category, {}):
+            if (category, alias) not in dropped:
+                continue
+            # dependents() is transitive, so anything still reaching this
+            # entry from outside the dropped set keeps it.
+            kept_by = [f"{c[:-1]} '{a}'" for c, a in config.dependents(category, alias) if (c, a) not in dropped]
+            if kept_by:
+                warnings.append(f"{category[:-1].capitalize()} '{alias}' is no longer in the source but is used by {', '.join(kept_by)}; kept.")
+                # Still managed, so a later resync removes it once unused.
+                digests.setdefault(category, {})[alias] = previous[category][alias]
+                continue
+            if config.remove(category, alias):
+                summary['removed'] += 1
+
+    return summary, digests, warnings
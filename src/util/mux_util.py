@@ -0,0 +1,66 @@
+import os
+import re
+import hashlib
+import subprocess
+from typing import Optional
+
+# Kept under the home directory rather than next to the config: Unix socket
+# paths are limited to ~104 bytes and the install path can be long.
+CONTROL_DIR = os.path.join(os.path.expanduser('~'), '.ssh', 'ussh-cm')
+DEFAULT_CONTROL_PERSIST = '10m'
+
+CONTROL_PERSIST_PATTERN = re.compile(r'^(yes|no|off|\d+[smhdwSMHDW]?)$')
+
+def control_path(alias: str) -> str:
+    digest = hashlib.sha1(alias.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(CONTROL_DIR, f"{digest}.sock")
+
+def control_persist(env: dict) -> str:
+    return env.get('control_persist') or DEFAULT_CONTROL_PERSIST
+
+def control_options(env: dict) -> list:
+    """Return the ssh options that share a master connection for `env`."""
+    persist = control_persist(env)
+    if persist == 'off':
+        return []
+    os.makedirs(CONTROL_DIR, mode=0o700, exist_ok=True)
+    return [
+        '-o', 'ControlMaster=auto',
+        '-o', f"ControlPath={control_path(env['alias'])}",
+        '-o', f"ControlPersist={persist}",
+    ]
+
+def _control_command(path: str, command: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        ['ssh', '-O', command, '-o', f"ControlPath={path}", 'ussh'],
+        capture_output=True,
+        text=True,
+    )
+
+def master_pid(path: str) -> Optional[int]:
+    """Return the PID of the master listening on `path`, or None if it is not running."""
+    if not os.path.exists(path):
+        return None
+    result = _control_command(path, 'check')
+    if result.returncode != 0:
+        return None
+    match = re.search(r'pid=(\d+)', result.stderr)
+    return int(match.group(1)) if match else 0
+
+def exit_master(path: str) -> bool:
+    return _control_command(path, 'exit').returncode == 0
+
+def session_counts(paths: list) -> dict:
+    """Count the ssh processes using each control path, masters included."""
+    counts = {path: 0 for path in paths}
+    try:
+        output = subprocess.check_output(['ps', '-axo', 'args='], text=True)
+    except (OSError, subprocess.CalledProcessError):
+        return counts
+    for line in output.splitlines():
+        # The first ControlPath is the process's own; a later one belongs
+        # to the ssh inside its ProxyCommand.
+        match = re.search(r'ControlPath=(\S+)', line)
+        if match and match.group(1) in counts:
+            counts[match.group(1)] += 1
+    return counts
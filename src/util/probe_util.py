@@ -0,0 +1,183 @@
+import json
+import math
+import os
+import time
+from typing import Optional
+from src.util.config_util import CONFIG_PATH, atomic_write
+
+# asyncio is imported inside the functions that probe: `ussh connect`
+# imports this module, and a host with one address never needs it.
+
+DEFAULT_PROBE_TIMEOUT = 3.0
+# Every connection in flight holds a socket, so the real bound is the
+# open-file limit less what the process needs otherwise.
+MAX_PROBE_CONCURRENCY = 4096
+RESERVED_FDS = 64
+
+ADDRESS_CACHE_PATH = os.path.join(os.path.dirname(CONFIG_PATH), 'address_cache.json')
+ADDRESS_CACHE_TTL = 300
+ADDRESS_PROBE_TIMEOUT = 1.0
+
+async def probe(address: str, port: int, timeout: float, banner: bool = False) -> dict:
+    """Open a TCP connection to address:port and time the handshake."""
+    import asyncio
+    result = {'address': address, 'port': port, 'status': 'ok', 'latency_ms': None, 'banner': None, 'error': None}
+    started = time.perf_counter()
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(address, port), timeout)
+    except asyncio.TimeoutError:
+        result['status'] = 'timeout'
+        return result
+    except ConnectionRefusedError:
+        result['status'] = 'refused'
+        return result
+    except OSError as e:
+        result['status'] = 'error'
+        result['error'] = e.strerror or str(e)
+        return result
+
+    result['latency_ms'] = round((time.perf_counter() - started) * 1000, 2)
+    try:
+        if banner:
+            remaining = max(timeout - (time.perf_counter() - started), 0.1)
+            try:
+                line = await asyncio.wait_for(reader.readline(), remaining)
+                result['banner'] = line.decode('utf-8', 'replace').strip() or None
+            except (asyncio.TimeoutError, OSError):
+                pass
+            if not (result['banner'] or '').startswith('SSH-'):
+                result['status'] = 'no-ssh'
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+    return result
+
+async def _probe_all(targets: list, timeout: float, concurrency: int, banner: bool) -> list:
+    import asyncio
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(address, port):
+        async with semaphore:
+            return await probe(address, port, timeout, banner)
+
+    return await asyncio.gather(*(bounded(address, port) for address, port in targets))
+
+def probe_concurrency_limit() -> int:
+    """Return how many connections fit in the open-file limit.
+
+    Raises the soft limit towards the hard one first, so that up to
+    MAX_PROBE_CONCURRENCY probes can run at once.
+    """
+    import resource
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    wanted = MAX_PROBE_CONCURRENCY + RESERVED_FDS
+    if soft != resource.RLIM_INFINITY and soft < wanted:
+        raised = wanted if hard == resource.RLIM_INFINITY else min(wanted, hard)
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (raised, hard))
+            soft = raised
+        except (ValueError, OSError):
+            pass
+    if soft == resource.RLIM_INFINITY:
+        return MAX_PROBE_CONCURRENCY
+    return max(min(soft - RESERVED_FDS, MAX_PROBE_CONCURRENCY), 1)
+
+def probe_all(targets: list, timeout: float = DEFAULT_PROBE_TIMEOUT,
+              concurrency: Optional[int] = None, banner: bool = False) -> list:
+    """Probe (address, port) pairs concurrently; results are in the same order.
+
+    `concurrency` defaults to, and is capped at, probe_concurrency_limit().
+    """
+    if not targets:
+        return []
+    limit = probe_concurrency_limit()
+    concurrency = limit if concurrency is None else min(concurrency, limit)
+    import asyncio
+    return asyncio.run(_probe_all(targets, timeout, concurrency, banner))
+
+def percentile(values: list, pct: float) -> Optional[float]:
+    """Nearest-rank percentile of `values`, or None if empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(math.ceil(pct / 100 * len(ordered)) - 1, 0)]
+
+def host_addresses(host: dict) -> list:
+    """Return the candidate addresses of a host, primary address first."""
+    addresses = [host['address']]
+    for address in host.get('alternate_addresses') or []:
+        if address not in addresses:
+            addresses.append(address)
+    return addresses
+
+async def _first_reachable(addresses: list, port: int, timeout: float) -> Optional[str]:
+    import asyncio
+    # Probes start together, so the first to connect is the fastest path.
+    tasks = [asyncio.ensure_future(probe(address, port, timeout)) for address in addresses]
+    try:
+        for next_result in asyncio.as_completed(tasks):
+            result = await next_result
+            if result['status'] == 'ok':
+                return result['address']
+        return None
+    finally:
+        for task in tasks:
+            task.cancel()
+
+def _load_address_cache() -> dict:
+    try:
+        with open(ADDRESS_CACHE_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def select_addresses(candidates: list, timeout: float = ADDRESS_PROBE_TIMEOUT) -> list:
+    """Pick the fastest reachable address for each (addresses, port) pair.
+
+    Single-address hosts are returned as is. Choices are cached for
+    ADDRESS_CACHE_TTL seconds; everything not cached is probed in one
+    concurrent round. If no address answers, the primary one is used.
+    """
+    chosen = [addresses[0] for addresses, _ in candidates]
+    if all(len(addresses) < 2 for addresses, _ in candidates):
+        return chosen
+    cache = _load_address_cache()
+    now = time.time()
+    misses = {}
+    for i, (addresses, port) in enumerate(candidates):
+        if len(addresses) < 2:
+            continue
+        key = f"{port} {' '.join(addresses)}"
+        entry = cache.get(key)
+        if entry and now - entry['checked'] < ADDRESS_CACHE_TTL:
+            chosen[i] = entry['address']
+        else:
+            misses.setdefault(key, (addresses, port, []))[2].append(i)
+
+    if not misses:
+        return chosen
+
+    import asyncio
+
+    async def probe_misses():
+        return await asyncio.gather(*(_first_reachable(addresses, port, timeout) for addresses, port, _ in misses.values()))
+
+    winners = asyncio.run(probe_misses())
+    cache = {key: entry for key, entry in cache.items() if now - entry['checked'] < ADDRESS_CACHE_TTL}
+    for (key, (addresses, port, indexes)), winner in zip(misses.items(), winners):
+        if winner is None:
+            continue
+        cache[key] = {'address': winner, 'checked': now}
+        for i in indexes:
+            chosen[i] = winner
+    try:
+        atomic_write(ADDRESS_CACHE_PATH, json.dumps(cache, indent=4).encode('utf-8'), sync=False)
+    except OSError:
+        pass
+    return chosen
+
+def select_address(host: dict, port: int) -> str:
+    return select_addresses([(host_addresses(host), int(port))])[0]
@@ -0,0 +1,186 @@
+import os
+import shlex
+import shutil
+from typing import Optional
+from src.util.config_util import Config, keypair_file_path, resolve_port
+from src.util.mux_util import control_options
+from src.util.probe_util import select_address
+from src.util.tunnel_util import forward_args
+
+def proxy_path(config: Config, alias: str) -> list:
+    """Follow proxy_alias from `alias`, stopping at the end or the first repeat.
+
+    A repeated alias is included once more at the end, so a loop shows as
+    path[-1] appearing earlier in the path.
+    """
+    path = []
+    env = config.lookup('environments', alias)
+    while env is not None:
+        path.append(env['alias'])
+        if path.count(env['alias']) > 1:
+            break
+        env = config.lookup('environments', env['proxy_alias']) if env.get('proxy_alias') else None
+    return path
+
+def proxy_cycle(config: Config, alias: str) -> Optional[list]:
+    """Return the aliases forming a proxy_alias loop reachable from `alias`, or None."""
+    path = proxy_path(config, alias)
+    if len(path) > 1 and path[-1] in path[:-1]:
+        return path[path.index(path[-1]):]
+    return None
+
+def _jump_host(hop: dict) -> str:
+    host = f"[{hop['host']}]" if ':' in hop['host'] else hop['host']
+    user = f"{hop['username']}@" if hop['username'] else ''
+    return f"{user}{host}:{hop['port']}"
+
+class Resolver:
+    """Resolve the environments of one config into ssh commands.
+
+    Hops (an environment's address, port, user and key) and proxy chains
+    are memoized, so environments sharing bastions resolve them once.
+    Methods raise ValueError if a referenced component is missing or the
+    proxy chain loops.
+    """
+
+    def __init__(self, config: Config):
+        self.config = config
+        self._hops = {}
+        self._key_paths = {}
+        self._chains = {}
+        self._proxy_options = {}
+
+    def _value(self, category: str, alias: str, label: str) -> str:
+        entry = self.config.lookup(category, alias)
+        if entry is None:
+            raise ValueError(f"{label} with alias '{alias}' not found.")
+        return entry['path'] if category == 'keypairs' else entry['value']
+
+    def _key_path(self, keypair_alias: str) -> str:
+        if keypair_alias not in self._key_paths:
+            key_path = keypair_file_path(self._value('keypairs', keypair_alias, 'Keypair'))
+            if not os.path.exists(key_path):
+                raise ValueError(f"Keypair file not found at '{key_path}'.")
+            self._key_paths[keypair_alias] = key_path
+        return self._key_paths[keypair_alias]
+
+    def hop(self, env: dict) -> dict:
+        """Return the address, port, user and credentials used to reach `env`."""
+        alias = env['alias']
+        if alias in self._hops:
+            return self._hops[alias]
+
+        host_entry = self.config.lookup('hosts', env['host_alias'])
+        if not host_entry:
+            raise ValueError(f"Host with alias '{env['host_alias']}' not found.")
+        port = resolve_port(self.config, env.get('port_alias'))
+
+        key_path = None
+        if env.get('keypair_alias'):
+            key_path = self._key_path(env['keypair_alias'])
+
+        hop = {
+            'alias': alias,
+            'host': select_address(host_entry, port),
+            'port': port,
+            'username': self._value('usernames', env['username_alias'], 'Username') if env.get('username_alias') else '',
+            'key_path': key_path,
+            'password': self._value('passwords', env['password_alias'], 'Password') if env.get('password_alias') else None,
+            'env': env,
+        }
+        self._hops[alias] = hop
+        return hop
+
+    def chain(self, env: dict) -> list:
+        """Return the hops of the bastions in front of `env`, nearest to us first."""
+        proxy_alias = env.get('proxy_alias')
+        if not proxy_alias:
+            return []
+        # Keyed by the first bastion: everything behind it shares the route.
+        if proxy_alias in self._chains:
+            return self._chains[proxy_alias]
+        cycle = proxy_cycle(self.config, env['alias'])
+        if cycle:
+            raise ValueError(f"Proxy chain loops: {' -> '.join(cycle)}.")
+
+        proxy_env = self.config.lookup('environments', proxy_alias)
+        if not proxy_env:
+            raise ValueError(f"Proxy environment with alias '{proxy_alias}' not found.")
+        proxy_hop = self.hop(proxy_env)
+        if proxy_hop['password'] and not proxy_hop['key_path']:
+            raise ValueError(
+                "Password authentication is not supported for proxy jump.\n"
+                "Proxy jump requires key-based authentication."
+            )
+        chain = self.chain(proxy_env) + [proxy_hop]
+        self._chains[proxy_alias] = chain
+        return chain
+
+    def _hop_options(self, hop: dict, multiplex: bool) -> list:
+        options = control_options(hop['env']) if multiplex else []
+        if hop['key_path']:
+            options += ['-i', hop['key_path']]
+        return options
+
+    def _proxy_command(self, chain: list, multiplex: bool) -> str:
+        # Each hop's ssh runs the previous hop's command as its own
+        # ProxyCommand; ssh expands %-tokens once per level, hence the escaping.
+        command = None
+        for hop in chain:
+            parts = ['ssh', '-W', '%h:%p'] + self._hop_options(hop, multiplex)
+            if command is not None:
+                parts += ['-o', f"ProxyCommand={command.replace('%', '%%')}"]
+            parts += ['-p', str(hop['port']), f"{hop['username']}@{hop['host']}" if hop['username'] else hop['host']]
+            command = shlex.join(parts)
+        return command
+
+    def proxy_options(self, env: dict, multiplex: bool = True) -> list:
+        """Return the ssh options that route a connection to `env` through its bastions.
+
+        A plain -J list when no bastion needs options of its own, otherwise
+        nested ProxyCommands carrying each bastion's key and master socket.
+        """
+        key = (env.get('proxy_alias'), multiplex)
+        if key in self._proxy_options:
+            return self._proxy_options[key]
+        chain = self.chain(env)
+        if not chain:
+            options = []
+        elif not any(self._hop_options(hop, multiplex) for hop in chain):
+            options = ['-J', ','.join(_jump_host(hop) for hop in chain)]
+        else:
+            options = ['-o', f"ProxyCommand={self._proxy_command(chain, multiplex)}"]
+        self._proxy_options[key] = options
+        return options
+
+    def connection(self, env: dict, forwards: Optional[list] = None, multiplex: bool = True) -> dict:
+        """Resolve `env` into the ssh command that connects to it.
+
+        With `forwards`, the command opens them instead of a shell. Returns
+        a dict with the command, host, port and username.
+        """
+        hop = self.hop(env)
+        ssh_command = ['ssh']
+        if multiplex:
+            ssh_command.extend(control_options(env))
+        if forwards:
+            ssh_command.extend(['-N', '-o', 'ExitOnForwardFailure=yes'])
+            ssh_command.extend(forward_args(forwards))
+        if hop['key_path']:
+            ssh_command.extend(['-i', hop['key_path']])
+        ssh_command.extend(self.proxy_options(env, multiplex))
+        ssh_command.extend(['-p', str(hop['port'])])
+        ssh_command.append(f"{hop['username']}@{hop['host']}" if hop['username'] else hop['host'])
+
+        if hop['password'] and not hop['key_path']:
+            if not shutil.which('sshpass'):
+                raise ValueError(
+                    "sshpass is not installed. Password authentication requires sshpass.\n"
+                    "Install it with: brew install hudochenkov/sshpass/sshpass (macOS) or apt-get install sshpass (Linux)"
+                )
+            ssh_command = ['sshpass', '-p', hop['password']] + ssh_command
+
+        return {'command': ssh_command, 'host': hop['host'], 'port': hop['port'], 'username': hop['username']}
+
+def resolve_connection(config: Config, env: dict, multiplex: bool = True) -> dict:
+    return Resolver(config).connection(env, multiplex=multiplex)
@@ -0,0 +1,313 @@
+import math
+import os
+import pickle
+import re
+from array import array
+from collections import Counter
+from itertools import chain
+from typing import Optional
+from src.util.config_util import CONFIG_PATH, Config, atomic_write, resolve_port, store_stamp, value_field
+
+SEARCH_INDEX_PATH = os.path.join(os.path.dirname(CONFIG_PATH), 'search_index.pickle')
+ENV_INDEX_PATH = os.path.join(os.path.dirname(CONFIG_PATH), 'env_index.pickle')
+SEARCH_INDEX_FORMAT = 1
+
+# Categories `ussh find` searches. Password values are never indexed, only
+# their aliases, so the index file holds nothing secret.
+SEARCH_CATEGORIES = ['hosts', 'ports', 'usernames', 'passwords', 'keypairs', 'environments']
+
+# Share of the query's trigrams a text must contain to count as a match.
+MIN_SIMILARITY = 0.5
+PREFIX_BOOST = 1.0
+SUBSTRING_BOOST = 0.5
+# Removing from a posting list is linear, so big batches rebuild instead.
+REBUILD_CHANGES = 1000
+
+# Fields of `find environment` queries: field=value, field!=value, field~substring.
+QUERY_FIELDS = ['alias', 'host', 'port', 'user', 'key', 'proxy', 'password']
+QUERY_PATTERN = re.compile(r'^([a-z]+)(!=|=|~)(.*)$')
+
+def trigrams(text: str) -> set:
+    """Trigrams of `text`, padded so that prefixes get trigrams of their own."""
+    padded = f"  {text.lower()} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def entry_texts(category: str, entry: dict) -> list:
+    texts = [str(entry['alias'])]
+    if category in ('passwords', 'environments'):
+        return texts
+    value = entry.get(value_field(category))
+    if value is not None:
+        texts.append(str(value))
+    if category == 'hosts':
+        texts.extend(entry.get('alternate_addresses') or [])
+    return texts
+
+class SearchIndex:
+    """Trigram index over the aliases and values of the searchable entries.
+
+    Built from a config once, then kept in step with it by applying the
+    changes of every save. `stamp` identifies the config version it matches.
+    Postings are arrays of document ids so the pickled index loads quickly.
+    """
+
+    def __init__(self):
+        self.stamp = None
+        self.keys = []
+        self.texts = []
+        self.postings = {}
+        self._ids = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_ids'] = None
+        return state
+
+    @property
+    def ids(self) -> dict:
+        if self._ids is None:
+            self._ids = {key: doc_id for doc_id, key in enumerate(self.keys) if key is not None}
+        return self._ids
+
+    @classmethod
+    def build(cls, config: Config) -> 'SearchIndex':
+        index = cls()
+        for category in SEARCH_CATEGORIES:
+            for entry in config.entries(category):
+                index.add(category, entry)
+        index.stamp = index_stamp(config)
+        return index
+
+    def add(self, category: str, entry: dict):
+        self.remove(category, entry['alias'])
+        doc_id = len(self.keys)
+        texts = [text.lower().replace('\n', ' ') for text in entry_texts(category, entry)]
+        self.keys.append((category, entry['alias']))
+        self.texts.append('\n'.join(texts))
+        self.ids[(category, entry['alias'])] = doc_id
+        for gram in set().union(*(trigrams(text) for text in texts)):
+            posting = self.postings.get(gram)
+            if posting is None:
+                posting = self.postings[gram] = array('I')
+            posting.append(doc_id)
+
+    def remove(self, category: str, alias: str):
+        doc_id = self.ids.pop((category, alias), None)
+        if doc_id is None:
+            return
+        for gram in set().union(*(trigrams(text) for text in self.texts[doc_id].split('\n'))):
+            posting = self.postings.get(gram)
+            if posting is not None:
+                posting.remove(doc_id)
+                if not posting:
+                    del self.postings[gram]
+        self.keys[doc_id] = None
+        self.texts[doc_id] = ''
+
+    def apply(self, config: Config, changes: list):
+        for change in changes:
+            op, category = change[0], change[1]
+            if category not in SEARCH_CATEGORIES:
+                continue
+            if op == 'remove':
+                self.remove(category, change[2])
+                continue
+            alias = change[2]['alias'] if op == 'add' else change[3].get('alias', change[2])
+            if op == 'update':
+                self.remove(category, change[2])
+            entry = config.lookup(category, alias)
+            if entry is not None:
+                self.add(category, entry)
+        self.stamp = index_stamp(config)
+
+    def search(self, query: str, categories: Optional[list] = None, limit: Optional[int] = None) -> list:
+        """Return (category, alias, score) tuples, best match first.
+
+        Texts containing the query always match. Other texts match when
+        they share at least MIN_SIMILARITY of the query's trigrams, so
+        small typos still match. Texts that start with or contain the
+        query are ranked above fuzzy matches.
+        """
+        query = query.lower()
+        grams = trigrams(query)
+        needed = max(math.ceil(len(grams) * MIN_SIMILARITY), 1)
+        counts = Counter(chain.from_iterable(self.postings[gram] for gram in grams if gram in self.postings))
+
+        # A text containing the query has every unpadded trigram of it, but
+        # mid-string it lacks the padded ones, so it can fall below `needed`.
+        inner = {query[i:i + 3] for i in range(len(query) - 2)}
+        contains = set()
+        if inner and all(gram in self.postings for gram in inner):
+            postings = sorted((self.postings[gram] for gram in inner), key=len)
+            contains = set(postings[0]).intersection(*postings[1:])
+
+        results = []
+        for doc_id, shared in counts.items():
+            key = self.keys[doc_id]
+            if key is None or (categories and key[0] not in categories):
+                continue
+            texts = self.texts[doc_id]
+            if shared < needed and not (doc_id in contains and query in texts):
+                continue
+            score = shared / len(grams)
+            if f"\n{texts}".find(f"\n{query}") != -1:
+                score += PREFIX_BOOST
+            elif query in texts:
+                score += SUBSTRING_BOOST
+            results.append((key[0], key[1], round(score, 3)))
+
+        results.sort(key=lambda r: (-r[2], r[1]))
+        return results[:limit] if limit else results
+
+def resolve_environment(config: Config, env: dict) -> dict:
+    """Return an environment with its components looked up."""
+    host = config.lookup('hosts', env.get('host_alias')) if env.get('host_alias') else None
+    username = config.lookup('usernames', env['username_alias']) if env.get('username_alias') else None
+    keypair = config.lookup('keypairs', env['keypair_alias']) if env.get('keypair_alias') else None
+    return {
+        'alias': env['alias'],
+        'host': env.get('host_alias'),
+        'addresses': ([host['address']] + list(host.get('alternate_addresses') or [])) if host else [],
+        'port': resolve_port(config, env.get('port_alias')),
+        'username_alias': env.get('username_alias'),
+        'user': username['value'] if username else None,
+        'keypair_alias': env.get('keypair_alias'),
+        'key_path': keypair['path'] if keypair else None,
+        'password_alias': env.get('password_alias'),
+        'proxy': env.get('proxy_alias'),
+    }
+
+def _query_values(resolved: dict) -> dict:
+    # Every value a query field matches against; '' stands for "not set".
+    values = {
+        'alias': [resolved['alias']],
+        'host': [resolved['host']] + resolved['addresses'],
+        'port': [resolved['port']],
+        'user': [resolved['username_alias'], resolved['user']],
+        'key': [resolved['keypair_alias'], resolved['key_path']],
+        'proxy': [resolved['proxy']],
+        'password': [resolved['password_alias']],
+    }
+    return {field: {str(v).lower() for v in vals if v is not None} or {''} for field, vals in values.items()}
+
+def parse_query(expressions) -> list:
+    """Parse `field=value` / `field!=value` / `field~value` terms.
+
+    A bare word is an alias substring. Raises ValueError on bad terms.
+    """
+    terms = []
+    for expression in expressions:
+        match = QUERY_PATTERN.match(expression)
+        if match is None:
+            if not expression or re.search(r'[=~]', expression):
+                raise ValueError(f"Invalid query term '{expression}'.")
+            terms.append(('alias', '~', expression.lower()))
+            continue
+        field, op, value = match.groups()
+        if field not in QUERY_FIELDS:
+            raise ValueError(f"Unknown query field '{field}'. Fields: {', '.join(QUERY_FIELDS)}.")
+        terms.append((field, op, value.lower()))
+    return terms
+
+class EnvironmentIndex:
+    """Resolved environments plus a value -> aliases index per query field.
+
+    Rebuilt whenever the config changes, hand edits included, since a
+    change to any host, user or key can alter the environments that use it.
+    """
+
+    def __init__(self):
+        self.stamp = None
+        self.environments = {}
+        self.fields = {field: {} for field in QUERY_FIELDS}
+
+    @classmethod
+    def build(cls, config: Config) -> 'EnvironmentIndex':
+        index = cls()
+        for env in config.entries('environments'):
+            resolved = resolve_environment(config, env)
+            index.environments[env['alias']] = resolved
+            for field, values in _query_values(resolved).items():
+                for value in values:
+                    index.fields[field].setdefault(value, set()).add(env['alias'])
+        index.stamp = index_stamp(config)
+        return index
+
+    def match(self, field: str, op: str, value: str) -> set:
+        values = self.fields[field]
+        if op == '=':
+            return values.get(value, set())
+        if op == '!=':
+            return set(self.environments) - values.get(value, set())
+        # Substring terms scan the distinct values of one field only.
+        return set().union(*(aliases for key, aliases in values.items() if value in key))
+
+    def query(self, terms: list) -> list:
+        """Return the resolved environments matching every term."""
+        if not terms:
+            matches = set(self.environments)
+        else:
+            sets = sorted((self.match(*term) for term in terms), key=len)
+            matches = sets[0].intersection(*sets[1:])
+        return [self.environments[alias] for alias in sorted(matches)]
+
+def loaded_store_stamp(config: Config) -> Optional[tuple]:
+    """Return the store's file stamp as of when `config` was loaded."""
+    if config.backend == 'sqlite':
+        return store_stamp('sqlite')
+    return config._disk_stamp
+
+def index_stamp(config: Config, store: Optional[tuple] = None) -> tuple:
+    """Identify the config state an index is built from.
+
+    Hand edits of info.json leave the version as is, so the store's file
+    stamp is part of it too.
+    """
+    return (SEARCH_INDEX_FORMAT, config.backend, config.version, store or loaded_store_stamp(config))
+
+def _read_index(path: str, cls: type):
+    try:
+        with open(path, 'rb') as f:
+            index = pickle.load(f)
+    except Exception:
+        return None
+    return index if isinstance(index, cls) else None
+
+def _write_index(path: str, index):
+    try:
+        atomic_write(path, pickle.dumps(index, protocol=pickle.HIGHEST_PROTOCOL), sync=False)
+    except OSError:
+        # The index is only a cache; it is rebuilt when missing or stale.
+        pass
+
+def load_environment_index(config: Config) -> EnvironmentIndex:
+    """Return the environment index for `config`, rebuilding it if it is out of date."""
+    index = _read_index(ENV_INDEX_PATH, EnvironmentIndex)
+    if index is None or index.stamp != index_stamp(config):
+        index = EnvironmentIndex.build(config)
+        _write_index(ENV_INDEX_PATH, index)
+    return index
+
+def load_search_index(config: Config) -> SearchIndex:
+    """Return the index for `config`, rebuilding it if it is out of date."""
+    index = _read_index(SEARCH_INDEX_PATH, SearchIndex)
+    if index is None or index.stamp != index_stamp(config):
+        index = SearchIndex.build(config)
+        _write_index(SEARCH_INDEX_PATH, index)
+    return index
+
+def update_search_index(config: Config, changes: list, store_before: Optional[tuple]):
+    """Apply the changes of a save to the index, if it exists.
+
+    `store_before` is the store's file stamp just before the save was written.
+    """
+    if not os.path.exists(SEARCH_INDEX_PATH):
+        return
+    index = _read_index(SEARCH_INDEX_PATH, SearchIndex)
+    previous = index_stamp(config, store_before)[:2] + (config.version - 1, store_before)
+    if index is None or index.stamp != previous or len(changes) > REBUILD_CHANGES:
+        # Another save was missed, or rebuilding is cheaper than patching.
+        index = SearchIndex.build(config)
+    else:
+        index.apply(config, changes)
+    _write_index(SEARCH_INDEX_PATH, index)
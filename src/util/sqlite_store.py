@@ -0,0 +1,223 @@
+import os
+import copy
+import json
+import sqlite3
+import tempfile
+from typing import Optional
+from urllib.parse import quote
+from src.util.config_util import CATEGORIES, REFERENCES, Config, StorageError, check_change, config_lock
+from src.util import config_util
+
+# Value columns are left untyped so SQLite keeps the JSON value types as-is.
+# Fields that are not listed here round-trip through the `extra` column.
+COLUMNS = {
+    'hosts': ['address'],
+    'ports': ['value'],
+    'usernames': ['value'],
+    'passwords': ['value'],
+    'keypairs': ['path'],
+    'environments': ['host_alias', 'port_alias', 'username_alias', 'password_alias', 'keypair_alias', 'proxy_alias'],
+    'tunnel_profiles': ['env_alias'],
+}
+
+# Environment references are indexed but not enforced as foreign keys:
+# port_alias may be a literal port number, and the commands validate them.
+REFERENCE_COLUMNS = ['host_alias', 'port_alias', 'username_alias', 'password_alias', 'keypair_alias', 'proxy_alias']
+
+def _create_schema(conn: sqlite3.Connection):
+    for category in CATEGORIES:
+        columns = ''.join(f", {column}" for column in COLUMNS[category])
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {category} "
+            f"(id INTEGER PRIMARY KEY AUTOINCREMENT, alias TEXT NOT NULL UNIQUE{columns}, extra TEXT)"
+        )
+    for column in REFERENCE_COLUMNS:
+        conn.execute(f"CREATE INDEX IF NOT EXISTS environments_{column} ON environments ({column})")
+    conn.execute("CREATE INDEX IF NOT EXISTS tunnel_profiles_env_alias ON tunnel_profiles (env_alias)")
+    conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+def _entry_to_row(category: str, entry: dict) -> list:
+    columns = COLUMNS[category]
+    extra = {k: v for k, v in entry.items() if k != 'alias' and k not in columns}
+    return [entry['alias']] + [entry.get(column) for column in columns] + [json.dumps(extra) if extra else None]
+
+def _row_to_entry(category: str, row: sqlite3.Row) -> dict:
+    entry = {column: row[column] for column in COLUMNS[category]}
+    entry['alias'] = row['alias']
+    if row['extra']:
+        entry.update(json.loads(row['extra']))
+    return entry
+
+class SqliteConfig(Config):
+    """Config backed by the SQLite store.
+
+    Rows are queried on demand. Mutations are visible to lookup() right away
+    but only reach the database when save_config commits them, so entries()
+    still lists the rows as they were loaded.
+    """
+
+    backend = 'sqlite'
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.conn.row_factory = sqlite3.Row
+        _create_schema(self.conn)
+        self.version = int(self._meta('version') or 0)
+        self.changes = []
+        self._cache = {}
+
+    def _meta(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row['value'] if row else None
+
+    def _set_meta(self, key: str, value: str):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def entries(self, category: str) -> list:
+        rows = self.conn.execute(f"SELECT * FROM {category} ORDER BY id")
+        return [_row_to_entry(category, row) for row in rows]
+
+    def lookup(self, category: str, alias: str) -> Optional[dict]:
+        key = (category, alias)
+        if key not in self._cache:
+            row = self.conn.execute(f"SELECT * FROM {category} WHERE alias = ?", (alias,)).fetchone()
+            self._cache[key] = _row_to_entry(category, row) if row else None
+        return self._cache[key]
+
+    def contains(self, category: str, alias: str) -> bool:
+        return self.lookup(category, alias) is not None
+
+    def referrers(self, category: str, alias: str) -> list:
+        # Uses the column indexes, then overlays changes not yet committed.
+        found = set()
+        for referring, fields in REFERENCES.items():
+            for field, target in fields.items():
+                if target != category:
+                    continue
+                rows = self.conn.execute(f"SELECT alias FROM {referring} WHERE {field} = ?", (alias,))
+                candidates = {row['alias'] for row in rows}
+                candidates.update(key[1] for key, entry in self._cache.items()
+                                  if key[0] == referring and entry is not None and entry.get(field) == alias)
+                for ref_alias in candidates:
+                    entry = self.lookup(referring, ref_alias)
+                    if entry is not None and entry.get(field) == alias:
+                        found.add((referring, ref_alias, field))
+        return sorted(found)
+
+    def _insert(self, category: str, entry: dict):
+        columns = ['alias'] + COLUMNS[category] + ['extra']
+        placeholders = ', '.join('?' for _ in columns)
+        self.conn.execute(
+            f"INSERT INTO {category} ({', '.join(columns)}) VALUES ({placeholders})",
+            _entry_to_row(category, entry),
+        )
+
+    def add(self, category: str, entry: dict):
+        self._cache[(category, entry['alias'])] = entry
+        self.changes.append(['add', category, copy.deepcopy(entry)])
+
+    def remove(self, category: str, alias: str) -> Optional[dict]:
+        entry = self.lookup(category, alias)
+        if entry is not None:
+            self._cache[(category, alias)] = None
+            self.changes.append(['remove', category, alias])
+        return entry
+
+    def update(self, category: str, alias: str, /, **fields) -> dict:
+        entry = self.lookup(category, alias)
+        if entry is None:
+            raise KeyError(alias)
+        entry.update(fields)
+        if entry['alias'] != alias:
+            self._cache[(category, alias)] = None
+            self._cache[(category, entry['alias'])] = entry
+        self.changes.append(['update', category, alias, copy.deepcopy(fields)])
+        return entry
+
+    def _execute(self, change: list):
+        op, category = change[0], change[1]
+        if op == 'add':
+            self._insert(category, change[2])
+        elif op == 'remove':
+            self.conn.execute(f"DELETE FROM {category} WHERE alias = ?", (change[2],))
+        elif op == 'update':
+            alias = change[2]
+            row = self.conn.execute(f"SELECT * FROM {category} WHERE alias = ?", (alias,)).fetchone()
+            entry = {**_row_to_entry(category, row), **change[3]}
+            columns = ['alias'] + COLUMNS[category] + ['extra']
+            assignments = ', '.join(f"{column} = ?" for column in columns)
+            self.conn.execute(
+                f"UPDATE {category} SET {assignments} WHERE alias = ?",
+                _entry_to_row(category, entry) + [alias],
+            )
+
+    def commit(self):
+        """Apply the recorded changes on top of the current database state."""
+        with config_lock():
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                current = int(self._meta('version') or 0)
+                if current != self.version:
+                    self._cache = {}
+                    for change in self.changes:
+                        check_change(self, change)
+                        self._execute(change)
+                        self._cache = {}
+                else:
+                    for change in self.changes:
+                        self._execute(change)
+                self.version = current + 1
+                self._set_meta('version', str(self.version))
+                self.conn.commit()
+            except BaseException:
+                self.conn.rollback()
+                raise
+        self._cache = {}
+        self.changes = []
+
+    def to_dict(self) -> dict:
+        data = {'version': self.version}
+        data.update(json.loads(self._meta('extra') or '{}'))
+        for category in CATEGORIES:
+            data[category] = self.entries(category)
+        return data
+
+def load_sqlite_config() -> SqliteConfig:
+    """Open the existing database; only `storage migrate` creates one.
+
+    Raises StorageError if there is none, e.g. when USSH_STORAGE=sqlite
+    is set before migrating.
+    """
+    # mode=rw keeps sqlite3 from creating an empty database on open.
+    uri = f"file:{quote(config_util.DB_PATH)}?mode=rw"
+    try:
+        return SqliteConfig(sqlite3.connect(uri, uri=True, timeout=30))
+    except sqlite3.OperationalError:
+        if os.path.exists(config_util.DB_PATH):
+            raise
+        raise StorageError(f"No SQLite store at '{config_util.DB_PATH}'. Run 'ussh storage migrate --to sqlite' first.")
+
+def create_database(source: Config) -> SqliteConfig:
+    """Write a new database file holding the same data as `source`."""
+    data = source.to_dict()
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(config_util.DB_PATH), prefix='.info.db.')
+    os.close(fd)
+    try:
+        conn = sqlite3.connect(tmp_path)
+        config = SqliteConfig(conn)
+        for category in CATEGORIES:
+            for entry in data[category]:
+                config._insert(category, entry)
+        extra = {k: v for k, v in data.items() if k != 'version' and k not in CATEGORIES}
+        if extra:
+            config._set_meta('extra', json.dumps(extra))
+        config._set_meta('version', str(source.version))
+        config.version = source.version
+        conn.commit()
+        conn.close()
+        os.replace(tmp_path, config_util.DB_PATH)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return load_sqlite_config()
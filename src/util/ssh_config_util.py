@@ -0,0 +1,117 @@
+import re
+from typing import Optional
+from src.util import config_util
+from src.util.config_util import Config, atomic_write, keypair_file_path
+
+HEADER = (
+    "# Generated by ussh from its environments. Do not edit: changes are\n"
+    "# overwritten after every 'ussh add/change/remove'.\n"
+)
+
+REFERENCE_FIELDS = {
+    'hosts': 'host_alias',
+    'ports': 'port_alias',
+    'usernames': 'username_alias',
+    'passwords': 'password_alias',
+    'keypairs': 'keypair_alias',
+    'environments': 'proxy_alias',
+}
+
+BLOCK_PATTERN = re.compile(r'^# ussh:begin (.+)\n(.*?)^# ussh:end \1\n', re.S | re.M)
+
+def _quote(value) -> str:
+    value = str(value)
+    return f'"{value}"' if re.search(r'\s', value) else value
+
+def render_environment(config: Config, env: dict) -> str:
+    """Render one environment as a Host block, wrapped in ussh markers."""
+    alias = env['alias']
+    lines = [f"# ussh:begin {alias}"]
+
+    if re.search(r'[\s*?!,"]', alias):
+        lines.append(f"# '{alias}' cannot be used as an ssh_config Host name.")
+        lines.append(f"# ussh:end {alias}")
+        return '\n'.join(lines) + '\n'
+
+    host = config.lookup('hosts', env['host_alias'])
+    if host is None:
+        lines.append(f"# Host with alias '{env['host_alias']}' not found.")
+        lines.append(f"# ussh:end {alias}")
+        return '\n'.join(lines) + '\n'
+
+    lines.append(f"Host {alias}")
+    lines.append(f"    HostName {host['address']}")
+
+    port_alias = env.get('port_alias')
+    port = config.lookup('ports', port_alias) if port_alias else None
+    if port is not None:
+        lines.append(f"    Port {port['value']}")
+    elif port_alias and str(port_alias).isdigit():
+        lines.append(f"    Port {port_alias}")
+
+    username = config.lookup('usernames', env['username_alias']) if env.get('username_alias') else None
+    if username is not None:
+        lines.append(f"    User {_quote(username['value'])}")
+
+    keypair = config.lookup('keypairs', env['keypair_alias']) if env.get('keypair_alias') else None
+    if keypair is not None:
+        lines.append(f"    IdentityFile {_quote(keypair_file_path(keypair['path']))}")
+        lines.append("    IdentitiesOnly yes")
+
+    if env.get('proxy_alias'):
+        lines.append(f"    ProxyJump {env['proxy_alias']}")
+
+    lines.append(f"# ussh:end {alias}")
+    return '\n'.join(lines) + '\n'
+
+def write_ssh_config(config: Config):
+    """Render every environment into SSH_CONFIG_PATH."""
+    blocks = [render_environment(config, env) for env in config.entries('environments')]
+    atomic_write(config_util.SSH_CONFIG_PATH, (HEADER + '\n' + '\n'.join(blocks)).encode('utf-8'))
+
+def _affected_environments(config: Config, changes: list) -> Optional[set]:
+    """Return the environment aliases whose Host block may have changed."""
+    affected = set()
+    components = {}
+    for change in changes:
+        op, category = change[0], change[1]
+        if category == 'tunnel_profiles':
+            continue
+        if category not in REFERENCE_FIELDS:
+            return None
+        alias = change[2]['alias'] if op == 'add' else change[2]
+        if category == 'environments':
+            affected.add(alias)
+            if op == 'update' and 'alias' in change[3]:
+                affected.add(change[3]['alias'])
+        components.setdefault(category, set()).add(alias)
+
+    if components:
+        for env in config.entries('environments'):
+            for category, aliases in components.items():
+                if env.get(REFERENCE_FIELDS[category]) in aliases:
+                    affected.add(env['alias'])
+    return affected
+
+def refresh_ssh_config(config: Config, changes: list):
+    """Re-render only the Host blocks touched by `changes`."""
+    affected = _affected_environments(config, changes)
+    try:
+        with open(config_util.SSH_CONFIG_PATH, 'r', encoding='utf-8') as f:
+            current = f.read()
+    except FileNotFoundError:
+        return
+    if affected is None or not current.startswith(HEADER):
+        write_ssh_config(config)
+        return
+    if not affected:
+        return
+
+    blocks = {match.group(1): match.group(0) for match in BLOCK_PATTERN.finditer(current)}
+    for alias in affected:
+        env = config.lookup('environments', alias)
+        if env is None:
+            blocks.pop(alias, None)
+        else:
+            blocks[alias] = render_environment(config, env)
+    atomic_write(config_util.SSH_CONFIG_PATH, (HEADER + '\n' + '\n'.join(blocks.values())).encode('utf-8'))
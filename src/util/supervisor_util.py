@@ -0,0 +1,189 @@
+import os
+import time
+import signal
+import asyncio
+import subprocess
+import click
+from src.util.probe_util import probe
+from src.util.tunnel_util import READY_MARKER, TUNNEL_LOG_DIR, TUNNEL_START_TIMEOUT, register_tunnel, unregister_tunnels
+
+# Marks a supervisor's registry record; checked against its cmdline like
+# READY_MARKER is for plain tunnels.
+SUPERVISOR_MARKER = 'supervise'
+
+KEEPALIVE_INTERVAL = 15
+KEEPALIVE_COUNT = 3
+BACKOFF_BASE = 1
+BACKOFF_MAX = 300
+# A run that stayed up this long resets the backoff.
+STABLE_SECONDS = 60
+# How long a detached supervisor gets to register before it counts as failed.
+SUPERVISOR_START_TIMEOUT = 10
+# Consecutive failed health checks before ssh is restarted. Checks only
+# count once ssh has connected; until then it gets TUNNEL_START_TIMEOUT.
+MAX_FAILED_CHECKS = 2
+
+class TunnelSupervisor:
+    """Keep one ssh tunnel process running, restarting it when it fails.
+
+    Local and dynamic forwards are health-checked by connecting to their
+    local port; remote forwards rely on ssh's own keepalives and
+    ExitOnForwardFailure. Counters are published in the tunnel registry.
+    """
+
+    def __init__(self, ssh_command: list, env_alias: str, forwards: list, check_interval: int = 10,
+                 backoff_max: int = BACKOFF_MAX, **fields):
+        self.ssh_command = ssh_command[:-1] + [
+            '-o', f'ServerAliveInterval={KEEPALIVE_INTERVAL}',
+            '-o', f'ServerAliveCountMax={KEEPALIVE_COUNT}',
+            '-o', 'PermitLocalCommand=yes',
+            '-o', f'LocalCommand=echo {READY_MARKER}',
+            ssh_command[-1],
+        ]
+        self.forwards = forwards
+        self.check_interval = check_interval
+        self.backoff_max = backoff_max
+        self.log_path = os.path.join(TUNNEL_LOG_DIR, f"supervise-{os.getpid()}.log")
+        self.record = {
+            'pid': os.getpid(),
+            'env': env_alias,
+            'forwards': forwards,
+            'started': time.time(),
+            'log': self.log_path,
+            'marker': SUPERVISOR_MARKER,
+            'supervised': True,
+            'state': 'starting',
+            'child_pid': None,
+            'restarts': 0,
+            'downtime': 0.0,
+            'last_error': None,
+            **fields,
+        }
+        self._up = False
+        self._down_since = None
+        self._stop = None
+
+    def _event(self, message: str):
+        click.echo(f"[{time.strftime('%H:%M:%S')}] {self.record['env']}: {message}")
+
+    def _publish(self, **fields):
+        self.record.update(fields)
+        self.record['downtime'] = round(self.record['downtime'], 1)
+        register_tunnel(self.record)
+
+    def _mark_up(self):
+        if self._up:
+            return
+        if self._down_since is not None:
+            self.record['downtime'] += time.time() - self._down_since
+            self._down_since = None
+        self._up = True
+        self._publish(state='up')
+        self._event("tunnel up")
+
+    def _mark_down(self, reason: str):
+        self._up = False
+        if self._down_since is None:
+            self._down_since = time.time()
+        self._publish(state='down', child_pid=None, last_error=reason)
+        self._event(f"tunnel down: {reason}")
+
+    def _read_log(self) -> str:
+        try:
+            with open(self.log_path, 'r', encoding='utf-8', errors='replace') as f:
+                return f.read()
+        except FileNotFoundError:
+            return ''
+
+    async def _healthy(self) -> bool:
+        ports = [int(f['local_port']) for f in self.forwards if f['type'] in ('local', 'dynamic')]
+        if not ports:
+            return READY_MARKER in self._read_log()
+        results = await asyncio.gather(*(probe('127.0.0.1', port, timeout=3) for port in ports))
+        return all(result['status'] == 'ok' for result in results)
+
+    async def _run_once(self) -> str:
+        """Run ssh until it exits, fails its health checks or we are stopped."""
+        os.makedirs(TUNNEL_LOG_DIR, exist_ok=True)
+        with open(self.log_path, 'wb') as log:
+            process = await asyncio.create_subprocess_exec(
+                *self.ssh_command,
+                stdin=subprocess.DEVNULL,
+                stdout=log,
+                stderr=log,
+                start_new_session=True,
+            )
+        self._publish(state='connecting', child_pid=process.pid)
+
+        exited = asyncio.ensure_future(process.wait())
+        stopped = asyncio.ensure_future(self._stop.wait())
+        failed_checks = 0
+        connect_deadline = time.monotonic() + TUNNEL_START_TIMEOUT
+        try:
+            while True:
+                # Check every second until the tunnel is up, then every interval.
+                timeout = self.check_interval if self._up else 1
+                await asyncio.wait({exited, stopped}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if stopped.done():
+                    return 'stopped'
+                if exited.done():
+                    output = self._read_log().replace(READY_MARKER, '').strip().splitlines()
+                    return output[-1] if output else f"ssh exited with status {process.returncode}"
+                if not self._up and READY_MARKER not in self._read_log():
+                    # Still connecting; chains of bastions can take a while.
+                    if time.monotonic() > connect_deadline:
+                        return f"not connected after {TUNNEL_START_TIMEOUT}s"
+                    continue
+                if await self._healthy():
+                    failed_checks = 0
+                    self._mark_up()
+                else:
+                    failed_checks += 1
+                    if failed_checks >= MAX_FAILED_CHECKS:
+                        return "forwarded port is not answering"
+        finally:
+            stopped.cancel()
+            if process.returncode is None:
+                try:
+                    os.killpg(process.pid, signal.SIGTERM)
+                except ProcessLookupError:
+                    pass
+                await process.wait()
+
+    async def run(self):
+        self._stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self._stop.set)
+
+        failures = 0
+        self._event(f"supervising (pid {os.getpid()})")
+        try:
+            while not self._stop.is_set():
+                started = time.monotonic()
+                reason = await self._run_once()
+                if reason == 'stopped':
+                    break
+                self._mark_down(reason)
+
+                if time.monotonic() - started >= STABLE_SECONDS:
+                    failures = 0
+                delay = min(BACKOFF_BASE * 2 ** failures, self.backoff_max)
+                failures += 1
+                self._event(f"restarting in {delay}s")
+                try:
+                    await asyncio.wait_for(self._stop.wait(), delay)
+                    break
+                except asyncio.TimeoutError:
+                    pass
+                self.record['restarts'] += 1
+        finally:
+            if self._down_since is not None:
+                self.record['downtime'] += time.time() - self._down_since
+            unregister_tunnels({self.record['pid']})
+            try:
+                os.remove(self.log_path)
+            except FileNotFoundError:
+                pass
+            self._event(f"stopped after {self.record['restarts']} restart(s), "
+                        f"{round(self.record['downtime'], 1)}s down")
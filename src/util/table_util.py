@@ -0,0 +1,105 @@
+import json
+import shutil
+import sys
+import textwrap
+from itertools import chain, islice
+from typing import Callable, Iterable, Iterator, Optional
+import click
+from click.core import ParameterSource
+
+# Machine-readable alternatives to the tables, for `--format`.
+RECORD_FORMATS = ['jsonl', 'tsv', 'json']
+
+def format_option(f):
+    """The --format option of commands that print tables."""
+    return click.option('--format', 'output_format', type=click.Choice(['table'] + RECORD_FORMATS), default='table', show_default=True, help='Output format; jsonl, tsv and json are meant for scripts.')(f)
+
+def group_defaults(ctx: click.Context, **values) -> dict:
+    """Fill in options a subcommand was not given from its group's options of the same name.
+
+    So `ussh list -n 5 host` behaves like `ussh list host -n 5`.
+    """
+    parent = ctx.parent.params if ctx.parent is not None else {}
+    return {
+        name: parent[name] if name in parent and ctx.get_parameter_source(name) == ParameterSource.DEFAULT else value
+        for name, value in values.items()
+    }
+
+def cell_text(value) -> str:
+    if value is None:
+        return ''
+    if isinstance(value, (list, tuple)):
+        return ', '.join(str(v) for v in value)
+    return str(value).replace('\n', ' ')
+
+def _tsv_cell(value) -> str:
+    if value is None:
+        return ''
+    if isinstance(value, dict):
+        value = json.dumps(value, ensure_ascii=False)
+    elif isinstance(value, (list, tuple)):
+        value = ','.join(str(v) for v in value)
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n')
+
+def table_lines(headers: list, rows: Callable[[], Iterable[list]]) -> Iterator[str]:
+    """Render rows as aligned columns, one line at a time.
+
+    `rows` is called twice: once to measure the columns and once to
+    render, so no rendered row is held in memory.
+    """
+    widths = [len(header) for header in headers]
+    for row in rows():
+        for i, value in enumerate(row):
+            widths[i] = max(widths[i], len(cell_text(value)))
+
+    def line(cells):
+        return '  '.join(cell.ljust(width) for cell, width in zip(cells, widths)).rstrip()
+
+    yield line(headers)
+    yield line(['-' * width for width in widths])
+    for row in rows():
+        yield line([cell_text(value) for value in row])
+
+def echo_lines(lines: Iterable[str], pager: bool = True):
+    """Write lines to stdout, through a pager if they overflow the terminal."""
+    lines = iter(lines)
+    if pager and sys.stdout.isatty():
+        height = shutil.get_terminal_size().lines
+        head = list(islice(lines, height))
+        if len(head) >= height:
+            click.echo_via_pager(f"{line}\n" for line in chain(head, lines))
+            return
+        lines = iter(head)
+    # click.echo flushes after every call, which dominates for long tables.
+    out = click.get_text_stream('stdout')
+    for line in lines:
+        out.write(f"{line}\n")
+    out.flush()
+
+def record_lines(records: Iterable[dict], output_format: str, fields: Optional[list] = None) -> Iterator[str]:
+    """Render dicts as JSON Lines, TSV or a JSON array, one line at a time.
+
+    TSV has a header row of `fields` and escapes tabs, newlines and
+    backslashes in values. The JSON array matches json.dumps(indent=4)
+    but is written one record at a time.
+    """
+    if output_format == 'jsonl':
+        for record in records:
+            yield json.dumps(record, ensure_ascii=False)
+    elif output_format == 'tsv':
+        yield '\t'.join(fields)
+        for record in records:
+            yield '\t'.join(_tsv_cell(record.get(field)) for field in fields)
+    else:
+        previous = None
+        for record in records:
+            if previous is None:
+                yield '['
+            else:
+                yield f"{previous},"
+            previous = textwrap.indent(json.dumps(record, indent=4, ensure_ascii=False), '    ')
+        if previous is None:
+            yield '[]'
+        else:
+            yield previous
+            yield ']'
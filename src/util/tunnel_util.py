@@ -0,0 +1,342 @@
+import os
+import json
+import time
+import signal
+import tempfile
+import subprocess
+from typing import Optional
+import click
+from src.util.config_util import CONFIG_PATH, atomic_write, config_lock
+
+TUNNEL_REGISTRY_PATH = os.path.join(os.path.dirname(CONFIG_PATH), 'tunnels.json')
+TUNNEL_LOG_DIR = os.path.join(os.path.dirname(CONFIG_PATH), 'tunnel_logs')
+TUNNEL_START_TIMEOUT = 30
+
+# Echoed by ssh through LocalCommand once it is connected. It also ends up in
+# the argv of every tunnel ussh starts, which tells them apart from a
+# reused PID.
+READY_MARKER = 'ussh-tunnel-ready'
+
+FORWARD_FLAGS = {'local': '-L', 'remote': '-R', 'dynamic': '-D'}
+DEFAULT_SOCKS_PORT = 1080
+
+class TunnelError(click.ClickException):
+    """A tunnel could not be started."""
+
+def forward_spec(forward: dict) -> str:
+    """Return the ssh -L/-R/-D argument for a forward."""
+    if forward['type'] == 'local':
+        return f"{forward['local_port']}:{forward['remote_host']}:{forward['remote_port']}"
+    if forward['type'] == 'remote':
+        return f"{forward['remote_port']}:{forward['local_host']}:{forward['local_port']}"
+    if forward.get('bind'):
+        return f"{forward['bind']}:{forward['local_port']}"
+    return str(forward['local_port'])
+
+def forward_args(forwards: list) -> list:
+    args = []
+    for forward in forwards:
+        args.extend([FORWARD_FLAGS[forward['type']], forward_spec(forward)])
+    return args
+
+def describe_forward(forward: dict) -> str:
+    if forward['type'] == 'local':
+        return f"L {forward['local_port']} → {forward.get('remote_alias') or forward['remote_host']}:{forward['remote_port']}"
+    if forward['type'] == 'remote':
+        return f"R {forward['remote_port']} → {forward['local_host']}:{forward['local_port']}"
+    if forward.get('bind'):
+        return f"D {forward['bind']}:{forward['local_port']} (SOCKS)"
+    return f"D {forward['local_port']} (SOCKS)"
+
+def forward_ports(forward: dict) -> set:
+    return {int(forward[key]) for key in ('local_port', 'remote_port') if forward.get(key) is not None}
+
+def _load_tunnels() -> list:
+    try:
+        with open(TUNNEL_REGISTRY_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return []
+
+def _save_tunnels(tunnels: list):
+    os.makedirs(os.path.dirname(TUNNEL_REGISTRY_PATH), exist_ok=True)
+    atomic_write(TUNNEL_REGISTRY_PATH, json.dumps(tunnels, indent=4, ensure_ascii=False).encode('utf-8'), sync=False)
+
+def tunnel_alive(record: dict) -> bool:
+    """Return whether the registered tunnel process is still running."""
+    pid = record['pid']
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    try:
+        with open(f"/proc/{pid}/cmdline", 'rb') as f:
+            return record.get('marker', READY_MARKER).encode('utf-8') in f.read()
+    except FileNotFoundError:
+        # No procfs (macOS): the PID check above is all there is.
+        return not os.path.isdir('/proc/self')
+    except OSError:
+        return True
+
+def _remove_log(record: dict):
+    if record.get('log'):
+        try:
+            os.remove(record['log'])
+        except FileNotFoundError:
+            pass
+
+def active_tunnels() -> list:
+    """Return registered tunnels whose process is alive, dropping the rest."""
+    with config_lock():
+        tunnels = _load_tunnels()
+        alive = [record for record in tunnels if tunnel_alive(record)]
+        if len(alive) != len(tunnels):
+            for record in tunnels:
+                if record not in alive:
+                    _remove_log(record)
+            _save_tunnels(alive)
+    return alive
+
+def register_tunnel(record: dict):
+    with config_lock():
+        tunnels = [t for t in _load_tunnels() if t['pid'] != record['pid'] and tunnel_alive(t)]
+        tunnels.append(record)
+        _save_tunnels(tunnels)
+
+def unregister_tunnels(pids: set):
+    with config_lock():
+        tunnels = _load_tunnels()
+        for record in tunnels:
+            if record['pid'] in pids:
+                _remove_log(record)
+        _save_tunnels([t for t in tunnels if t['pid'] not in pids])
+
+def stop_tunnel(record: dict) -> bool:
+    """Terminate a tunnel process (its whole group if ussh spawned it).
+
+    Supervisors are signalled directly; they stop their own ssh.
+    """
+    try:
+        if record.get('registered', True) and not record.get('supervised'):
+            os.killpg(record['pid'], signal.SIGTERM)
+        else:
+            os.kill(record['pid'], signal.SIGTERM)
+        return True
+    except ProcessLookupError:
+        return False
+
+def _process_io(pid: int) -> Optional[tuple]:
+    try:
+        with open(f"/proc/{pid}/io", 'r') as f:
+            fields = dict(line.split(': ', 1) for line in f.read().splitlines())
+        return int(fields['rchar']), int(fields['wchar'])
+    except (OSError, KeyError, ValueError):
+        return None
+
+def tunnel_io(record: dict) -> Optional[dict]:
+    """Return the bytes read and written by a tunnel's ssh process(es).
+
+    Counts socket traffic on both sides of ssh, so a forwarded byte shows
+    up roughly once as read and once as written. Needs /proc.
+    """
+    pid = record.get('child_pid') or record['pid']
+    pids = [pid]
+    try:
+        # sshpass wraps the ssh process that does the actual forwarding.
+        with open(f"/proc/{pid}/task/{pid}/children", 'r') as f:
+            pids += [int(child) for child in f.read().split()]
+    except OSError:
+        pass
+    totals = [_process_io(p) for p in pids]
+    totals = [t for t in totals if t is not None]
+    if not totals:
+        return None
+    return {'read_bytes': sum(t[0] for t in totals), 'written_bytes': sum(t[1] for t in totals)}
+
+def format_bytes(count: int) -> str:
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if count < 1024 or unit == 'GiB':
+            return f"{count:.0f} {unit}" if unit == 'B' else f"{count:.1f} {unit}"
+        count /= 1024
+
+def _read_log(path: str) -> str:
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            return f.read()
+    except FileNotFoundError:
+        return ''
+
+def spawn_tunnel(ssh_command: list, timeout: int = TUNNEL_START_TIMEOUT) -> tuple:
+    """Start `ssh_command` detached and wait until it is connected.
+
+    The command must end with the destination. Returns (process, log path).
+    Raises TunnelError with ssh's output if it exits or times out first.
+    """
+    ssh_command = ssh_command[:-1] + [
+        '-o', 'PermitLocalCommand=yes',
+        '-o', f'LocalCommand=echo {READY_MARKER}',
+        ssh_command[-1],
+    ]
+    os.makedirs(TUNNEL_LOG_DIR, exist_ok=True)
+    fd, log_path = tempfile.mkstemp(dir=TUNNEL_LOG_DIR, suffix='.log')
+    try:
+        process = subprocess.Popen(
+            ssh_command,
+            stdin=subprocess.DEVNULL,
+            stdout=fd,
+            stderr=fd,
+            start_new_session=True,
+        )
+    except OSError as e:
+        os.remove(log_path)
+        raise TunnelError(f"Could not start ssh: {e}")
+    finally:
+        os.close(fd)
+
+    deadline = time.monotonic() + timeout
+    ready_at = None
+    while True:
+        if process.poll() is not None:
+            output = _read_log(log_path).replace(READY_MARKER, '').strip()
+            os.remove(log_path)
+            raise TunnelError(output or f"ssh exited with status {process.returncode}.")
+        if ready_at is None and READY_MARKER in _read_log(log_path):
+            ready_at = time.monotonic()
+        # Remote forwards are confirmed after LocalCommand runs; with
+        # ExitOnForwardFailure ssh exits shortly after if one was refused.
+        if ready_at is not None and time.monotonic() - ready_at >= 0.5:
+            return process, log_path
+        if time.monotonic() > deadline:
+            os.killpg(process.pid, signal.SIGTERM)
+            os.remove(log_path)
+            raise TunnelError(f"Timed out after {timeout}s waiting for the tunnel to connect.")
+        time.sleep(0.1)
+
+def start_tunnel(ssh_command: list, env_alias: str, forwards: list, **fields) -> dict:
+    """Start a tunnel in the background and record it in the registry."""
+    process, log_path = spawn_tunnel(ssh_command)
+    record = {
+        'pid': process.pid,
+        'env': env_alias,
+        'forwards': forwards,
+        'started': time.time(),
+        'log': log_path,
+        **fields,
+    }
+    register_tunnel(record)
+    return record
+
+# ssh options that take an argument, from ssh(1).
+SSH_ARG_OPTIONS = set('BDEFIJLOPQRSWbceilmopw')
+
+def parse_ssh_argv(argv: list) -> Optional[dict]:
+    """Parse an ssh argv into its forwards, user and destination.
+
+    Returns None if it is not an ssh process with -N and at least one
+    forward.
+    """
+    forwards = []
+    user = None
+    destination = None
+    no_command = False
+    i = 1
+    while i < len(argv):
+        arg = argv[i]
+        i += 1
+        if destination is None and arg.startswith('-') and len(arg) > 1:
+            j = 1
+            while j < len(arg):
+                flag = arg[j]
+                if flag in SSH_ARG_OPTIONS:
+                    value = arg[j + 1:]
+                    if not value and i < len(argv):
+                        value = argv[i]
+                        i += 1
+                    if flag in 'LRD':
+                        forwards.append((flag, value))
+                    elif flag == 'l':
+                        user = value
+                    break
+                if flag == 'N':
+                    no_command = True
+                j += 1
+        elif destination is None:
+            destination = arg
+        else:
+            break
+    if not no_command or not forwards or destination is None:
+        return None
+    if '@' in destination:
+        user, destination = destination.rsplit('@', 1)
+    return {'forwards': forwards, 'user': user, 'destination': destination}
+
+def _parse_forward(flag: str, spec: str, address_aliases: dict) -> Optional[dict]:
+    parts = spec.split(':')
+    if flag == 'L' and len(parts) >= 3:
+        return {'type': 'local', 'local_port': parts[-3], 'remote_host': parts[-2],
+                'remote_alias': address_aliases.get(parts[-2]), 'remote_port': parts[-1]}
+    if flag == 'R' and len(parts) >= 3:
+        return {'type': 'remote', 'remote_port': parts[-3], 'local_host': parts[-2], 'local_port': parts[-1]}
+    if flag == 'D':
+        return {'type': 'dynamic', 'local_port': parts[-1]}
+    return None
+
+def _proc_ssh_processes():
+    """Yield (pid, argv) for ssh processes by reading /proc/<pid>/cmdline."""
+    for entry in os.scandir('/proc'):
+        if not entry.name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry.name}/cmdline", 'rb') as f:
+                raw = f.read()
+        except OSError:
+            continue
+        # Cheap byte check before decoding: almost no process is ssh.
+        if b'ssh' not in raw:
+            continue
+        argv = raw.rstrip(b'\0').decode('utf-8', 'replace').split('\0')
+        if os.path.basename(argv[0]) == 'ssh':
+            yield int(entry.name), argv
+
+def _ps_ssh_processes():
+    """Yield (pid, argv) for ssh processes from ps, where there is no /proc."""
+    try:
+        ps_output = subprocess.check_output(['ps', '-axww', '-o', 'pid=,args='], text=True)
+    except (OSError, subprocess.CalledProcessError):
+        return
+    for line in ps_output.splitlines():
+        pid, _, args = line.strip().partition(' ')
+        argv = args.split()
+        if argv and os.path.basename(argv[0]) == 'ssh':
+            yield int(pid), argv
+
+def discover_tunnels(address_aliases: dict) -> list:
+    """Find ssh forwarding processes, including ones ussh did not start.
+
+    `address_aliases` maps host addresses to aliases and is used to name
+    tunnel targets. Processes started by ussh carry READY_MARKER and are
+    left to the registry.
+    """
+    processes = _proc_ssh_processes() if os.path.isdir('/proc/self') else _ps_ssh_processes()
+    found = []
+    for pid, argv in processes:
+        if any(READY_MARKER in arg for arg in argv):
+            continue
+        parsed = parse_ssh_argv(argv)
+        if parsed is None:
+            continue
+        forwards = [f for f in (_parse_forward(flag, spec, address_aliases) for flag, spec in parsed['forwards']) if f]
+        if not forwards:
+            continue
+        destination = parsed['destination']
+        found.append({
+            'pid': pid,
+            'env': None,
+            'target': address_aliases.get(destination, destination),
+            'forwards': forwards,
+            'started': None,
+            'registered': False,
+        })
+    return found
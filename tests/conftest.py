@@ -0,0 +1,34 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The config lives inside the package (src/config), so every test runs ussh
+# from its own copy of the tree.
+IGNORED = shutil.ignore_patterns('__pycache__', 'info.*', '*.json', '*.pickle', 'tunnel_logs', 'secrets')
+
+def write_config(tree: str, data: dict):
+    config = {'version': 0, 'hosts': [], 'ports': [], 'usernames': [], 'passwords': [], 'keypairs': [], 'environments': []}
+    config.update(data)
+    with open(os.path.join(tree, 'src', 'config', 'info.json'), 'w', encoding='utf-8') as f:
+        json.dump(config, f)
+
+def run_ussh(tree: str, *args, env: dict = None, python_flags: tuple = ()) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *python_flags, '-m', 'src.main', *args],
+        cwd=tree,
+        env={**os.environ, 'HOME': tree, **(env or {})},
+        capture_output=True,
+        text=True,
+    )
+
+@pytest.fixture
+def tree(tmp_path):
+    """A copy of the package with an empty config."""
+    shutil.copytree(os.path.join(REPO_ROOT, 'src'), tmp_path / 'src', ignore=IGNORED)
+    write_config(str(tmp_path), {})
+    return str(tmp_path)
@@ -0,0 +1,14 @@
+import os
+from conftest import run_ussh
+
+def test_non_scalar_values_fail_per_row(tree):
+    path = os.path.join(tree, 'rows.jsonl')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{"type": "port", "value": [1]}\n')
+        f.write('{"type": "host", "value": "10.0.0.1", "alias": {"a": 1}}\n')
+        f.write('{"type": "port", "value": 2022, "alias": "ssh-alt"}\n')
+    result = run_ussh(tree, 'add', 'bulk', path)
+    assert result.returncode == 0, result.stderr
+    assert "Row 1: Error: Field 'value' must be a string or number." in result.stdout
+    assert "Row 2: Error: Field 'alias' must be a string or number." in result.stdout
+    assert "Added 1 entries (ports: 1)." in result.stdout
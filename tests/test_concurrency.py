@@ -0,0 +1,42 @@
+import json
+import os
+import subprocess
+import sys
+import pytest
+from conftest import run_ussh
+
+WRITERS = 12
+# Writers racing to add the same alias; exactly one may win.
+DUPLICATES = 4
+
+def start_add_host(tree, alias, address, env):
+    return subprocess.Popen(
+        [sys.executable, '-m', 'src.main', 'add', 'host', '-v', address, '-l', alias],
+        cwd=tree,
+        env={**os.environ, 'HOME': tree, **env},
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+    )
+
+@pytest.mark.parametrize('storage', ['json', 'journal', 'sqlite'])
+def test_parallel_writers(tree, storage):
+    env = {}
+    if storage == 'sqlite':
+        result = run_ussh(tree, 'storage', 'migrate', '--to', 'sqlite')
+        assert result.returncode == 0, result.stdout + result.stderr
+    else:
+        env['USSH_STORAGE'] = storage
+
+    processes = [start_add_host(tree, f"host-{i}", f"10.0.0.{i}", env) for i in range(WRITERS)]
+    duplicates = [start_add_host(tree, 'shared', f"10.1.0.{i}", env) for i in range(DUPLICATES)]
+    for process in processes:
+        output = process.communicate()[0]
+        assert process.returncode == 0 and 'added with alias' in output, output
+    outputs = [process.communicate()[0] for process in duplicates]
+    assert sum('added with alias' in output for output in outputs) == 1, outputs
+
+    result = run_ussh(tree, 'list', 'host', '--format', 'jsonl', env=env)
+    assert result.returncode == 0, result.stderr
+    aliases = [json.loads(line)['alias'] for line in result.stdout.splitlines()]
+    assert sorted(aliases) == sorted([f"host-{i}" for i in range(WRITERS)] + ['shared'])
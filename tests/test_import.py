@@ -0,0 +1,35 @@
+import json
+import os
+from conftest import run_ussh, write_config
+
+def import_ssh_config(tree, text):
+    path = os.path.join(tree, 'ssh_config_source')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    result = run_ussh(tree, 'import', 'ssh-config', path, '--force')
+    assert result.returncode == 0, result.stderr
+    return result.stdout
+
+def entries(tree, category) -> dict:
+    result = run_ussh(tree, 'list', category, '--format', 'jsonl')
+    assert result.returncode == 0, result.stderr
+    return {record['alias']: record for record in map(json.loads, result.stdout.splitlines())}
+
+def test_conflicting_host_skips_entries_using_it(tree):
+    write_config(tree, {'hosts': [{'alias': 'eu-prod-1', 'address': '10.20.30.40'}]})
+    output = import_ssh_config(tree, (
+        "Host eu-prod-1\n  HostName 5.5.5.5\n  User admin\n"
+        "Host app\n  HostName 5.5.5.6\n  User admin\n  ProxyJump eu-prod-1\n"
+        "Host other\n  HostName 5.5.5.7\n  User admin\n"
+    ))
+    assert "Host 'eu-prod-1' already exists" in output
+    assert entries(tree, 'host')['eu-prod-1']['address'] == '10.20.30.40'
+    assert set(entries(tree, 'env')) == {'other'}
+
+def test_identical_hand_made_entry_is_not_managed(tree):
+    write_config(tree, {'usernames': [{'alias': 'admin', 'value': 'admin'}]})
+    import_ssh_config(tree, "Host web\n  HostName 5.5.5.5\n  User admin\n")
+    assert 'admin' in entries(tree, 'user')
+    import_ssh_config(tree, "Host db\n  HostName 5.5.5.8\n  User root\n")
+    assert set(entries(tree, 'user')) == {'admin', 'root'}
+    assert set(entries(tree, 'host')) == {'db'}
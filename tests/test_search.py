@@ -0,0 +1,51 @@
+import json
+import pytest
+from conftest import run_ussh, write_config
+
+CONFIG = {
+    'hosts': [
+        {'alias': 'eu-prod-1', 'address': '10.20.30.40'},
+        {'alias': 'xxabcxx', 'address': '192.168.0.9'},
+        {'alias': 'staging', 'address': 'staging.example.com'},
+    ],
+}
+
+def find(tree, *args) -> list:
+    result = run_ussh(tree, 'find', *args, '--format', 'jsonl')
+    assert result.returncode == 0, result.stderr
+    return [json.loads(line)['alias'] for line in result.stdout.splitlines()]
+
+@pytest.mark.parametrize('args, alias', [
+    (('-q', 'prod'), 'eu-prod-1'),
+    (('-q', 'abc'), 'xxabcxx'),
+    (('host', '-q', '30.4'), 'eu-prod-1'),
+    (('host', '-q', 'example'), 'staging'),
+    (('-q', 'pr'), 'eu-prod-1'),
+])
+def test_substring_matches(tree, args, alias):
+    write_config(tree, CONFIG)
+    assert alias in find(tree, *args)
+
+def test_typo_matches(tree):
+    write_config(tree, CONFIG)
+    assert find(tree, '-q', 'stagign')[0] == 'staging'
+
+def test_hand_edit_refreshes_index(tree):
+    write_config(tree, CONFIG)
+    assert find(tree, '-q', 'zhost') == []
+    # Same version, so only the file stamp tells the index it is stale.
+    write_config(tree, {'hosts': CONFIG['hosts'] + [{'alias': 'zhost', 'address': '10.9.9.9'}]})
+    assert find(tree, '-q', 'zhost') == ['zhost']
+
+def test_saves_keep_index_in_step(tree):
+    write_config(tree, CONFIG)
+    find(tree, '-q', 'prod')
+    result = run_ussh(tree, 'add', 'host', '-v', '10.7.7.7', '-l', 'newhost')
+    assert result.returncode == 0, result.stderr
+    assert find(tree, '-q', 'newhost') == ['newhost']
+
+def test_hand_edit_refreshes_environment_index(tree):
+    write_config(tree, CONFIG)
+    assert find(tree, 'env', 'alias=zenv') == []
+    write_config(tree, {**CONFIG, 'environments': [{'alias': 'zenv', 'host_alias': 'staging', 'port_alias': '22'}]})
+    assert find(tree, 'env', 'alias=zenv') == ['zenv']
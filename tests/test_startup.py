@@ -0,0 +1,38 @@
+from conftest import run_ussh, write_config
+
+# Total -X importtime self time of `ussh connect --dry-run`, interpreter
+# startup included. Importing click accounts for about half of it.
+IMPORT_BUDGET_MS = 250
+
+# Modules that single-address connects must not load.
+HEAVY_MODULES = {'asyncio', 'concurrent.futures', 'tabulate', 'sqlite3'}
+
+def imported_modules(stderr: str) -> dict:
+    """Map module name to self import time in microseconds."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = int(self_us)
+    return modules
+
+def connect_dry_run(tree):
+    result = run_ussh(tree, 'connect', 'web', '--dry-run', python_flags=('-X', 'importtime'))
+    assert result.returncode == 0, result.stderr
+    assert 'root@10.0.0.1' in result.stdout
+    return imported_modules(result.stderr)
+
+def test_connect_startup(tree):
+    write_config(tree, {
+        'hosts': [{'alias': 'web', 'address': '10.0.0.1'}],
+        'usernames': [{'alias': 'root', 'value': 'root'}],
+        'environments': [{'alias': 'web', 'host_alias': 'web', 'port_alias': '22', 'username_alias': 'root'}],
+    })
+    # First run resolves the connection, second one hits the connection cache.
+    for cached in (False, True):
+        modules = connect_dry_run(tree)
+        assert not HEAVY_MODULES & set(modules), sorted(HEAVY_MODULES & set(modules))
+        assert sum(modules.values()) / 1000 < IMPORT_BUDGET_MS
+        if cached:
+            assert 'src.util.resolver_util' not in modules